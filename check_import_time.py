@@ -0,0 +1,84 @@
+"""
+Import-time budget check for the web app
+
+Imports src.web_dashboard in a fresh interpreter, the way every gunicorn
+worker and autoscaled instance does, and fails if that takes longer than the
+budget or pulls in a module that should only load on first use.
+
+Usage: python check_import_time.py [budget_seconds]
+"""
+import subprocess
+import json
+import sys
+import os
+
+MODULE = 'src.web_dashboard'
+DEFAULT_BUDGET = 1.5  # seconds
+RUNS = 3
+
+# Heavy dependencies the web server must not import until they are actually needed
+LAZY_MODULES = ['matplotlib', 'seaborn', 'sklearn', 'scipy']
+
+PROBE = """
+import json, sys, time
+sys.path.insert(0, 'src')
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'loaded': [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import(module=MODULE):
+    """Import module in a new interpreter; returns (seconds, eagerly loaded lazy modules, -X importtime log)"""
+    env = dict(os.environ, CRM_PRELOAD_MODELS='0', CRM_WARM_UP='0')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE.format(module=module, lazy=LAZY_MODULES)],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    return report['seconds'], report['loaded'], result.stderr
+
+
+def heaviest_imports(importtime_log, limit=8):
+    """Direct imports of the app by cumulative import time (microseconds), from a -X importtime log"""
+    totals = []
+    for line in importtime_log.splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            name = parts[2].rstrip()
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            if depth == 1:  # depth 0 is the app itself (and interpreter start-up)
+                totals.append((int(parts[1]), name.strip()))
+    return sorted(totals, reverse=True)[:limit]
+
+
+def main():
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BUDGET
+
+    # Best of a few runs, so a cold disk cache on the first one does not fail the check
+    runs = [measure_import() for _ in range(RUNS)]
+    seconds, loaded, log = min(runs, key=lambda run: run[0])
+
+    print(f"⏱️ import {MODULE}: {seconds:.2f}s (budget {budget:.2f}s)")
+    for micros, name in heaviest_imports(log):
+        print(f"   {micros / 1e6:6.2f}s  {name}")
+
+    failed = False
+    if seconds > budget:
+        print(f"❌ Import time is over budget by {seconds - budget:.2f}s")
+        failed = True
+    if loaded:
+        print(f"❌ Imported eagerly, should load on first use: {', '.join(loaded)}")
+        failed = True
+
+    if not failed:
+        print("✅ Import time within budget")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,31 @@
+"""
+Gunicorn configuration - load models once in the master and share them with forked workers
+"""
+import sys
+import os
+
+pythonpath = 'src'
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# WEB_CONCURRENCY sets the number of worker processes (gunicorn's default of 1 otherwise).
+# Each worker holds its own copy-on-write view of the preloaded models and its own
+# threads, so raise it deliberately, e.g. WEB_CONCURRENCY=$((2 * $(nproc) + 1)).
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+
+# Socket.IO runs in threading mode: every open websocket holds a worker thread.
+# GUNICORN_THREADS sets the threads per worker (open websockets + concurrent requests).
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 100))
+
+# Import the app (and train/load every model) in the master before forking workers;
+# the database seed and score materialization then run in the workers, in the background,
+# so the listeners are open while they load. Set CRM_PRELOAD_MODELS=0 to fall back to
+# per-worker background warm-up.
+preload_app = os.environ.setdefault('CRM_PRELOAD_MODELS', '1') == '1'
+
+
+def post_fork(server, worker):
+    for name in ('web_dashboard', 'src.web_dashboard'):
+        module = sys.modules.get(name)
+        if module is not None:
+            module.after_fork()
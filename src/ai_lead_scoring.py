@@ -3,25 +3,44 @@ AI Lead Scoring System - Updated to use Real Dataset
 """
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder
+import threading
+import hashlib
+import copy
 import os
+from dataset_registry import get_dataset
+from model_store import ModelStore
+from tree_ensemble import CompiledForest
+from categorical_encoding import CategoryEncoder
+from hot_leads_index import HotLeadsIndex
+from feature_cache import FeatureMatrixCache
 
 
 class LeadScorer:
-    def __init__(self, dataset_path='data/dataset.csv'):
+    ARTIFACT_NAME = 'lead_scorer'
+    CATEGORICAL_COLS = ['source', 'industry', 'region', 'stage']
+    RESERVOIR_SIZE = 20000
+
+    def __init__(self, dataset_path='data/dataset.csv', model_dir='models', n_jobs=None):
         self.dataset_path = dataset_path
+        self.model_store = ModelStore(model_dir)
+        self.feature_cache = FeatureMatrixCache(os.path.join(model_dir, 'features'))
+        self.n_jobs = n_jobs  # Cores used while fitting; the served model predicts single-threaded
         self.model = None
+        self.compiled_model = None
+        self.model_version = 'rules'  # Stamped on persisted scores; changes whenever the model does
         self.df = None
-        self.label_encoders = {}
+        self.encoders = {}
+        self.hot_index = None
+        self.reservoir = None  # Uniform sample of labeled feature rows replayed by incremental updates
+        self.reservoir_seen = 0
+        self._update_lock = threading.Lock()
         self.load_and_train()
 
     def load_and_train(self):
         """Load dataset and train lead scoring model"""
         try:
             if os.path.exists(self.dataset_path):
-                self.df = pd.read_csv(self.dataset_path)
+                self.df = get_dataset(self.dataset_path)
                 print(f"✅ Loaded dataset with {len(self.df)} records for lead scoring")
 
                 if len(self.df) > 20:
@@ -33,58 +52,179 @@ class LeadScorer:
         except Exception as e:
             print(f"Error loading dataset for lead scoring: {e}")
 
+    @classmethod
+    def model_fingerprint(cls, df):
+        """Model-store key for training on this dataset under the current feature schema"""
+        source_cols = ['revenue_potential', 'days_to_convert'] + cls.CATEGORICAL_COLS + ['converted']
+        return ModelStore.fingerprint(df, source_cols, {
+            'n_estimators': 100,
+            'max_depth': 10,
+            'random_state': 42,
+            'encoder': 'CategoryEncoder',
+            'missing_categories': 'unknown',
+            'reservoir_size': cls.RESERVOIR_SIZE
+        })
+
+    def _install_model(self, model, version):
+        """Swap in a fitted forest; in-flight calls keep using the previous one"""
+        compiled_model = CompiledForest.from_sklearn(model)
+        self.model, self.compiled_model, self.model_version = model, compiled_model, version
+        self.hot_index = None  # Scores change with the model
+
+    def _save_model(self, fingerprint):
+        self.model_store.save(self.ARTIFACT_NAME, fingerprint,
+                              model=self.model, encoders=self.encoders,
+                              reservoir=self.reservoir, reservoir_seen=self.reservoir_seen)
+
     def _train_model(self):
         """Train Random Forest model for lead scoring"""
+        self.hot_index = None  # Scores change with the model
         try:
-            df = self.df.copy()
-
-            # Prepare features
-            df['revenue_potential'] = df['revenue_potential'].fillna(0)
-            df['days_to_convert'] = df['days_to_convert'].fillna(30)
+            categorical_cols = self.CATEGORICAL_COLS
+            fingerprint = self.model_fingerprint(self.df)
+
+            artifact = self.model_store.load(self.ARTIFACT_NAME, fingerprint)
+            if artifact is not None:
+                self.encoders = artifact['encoders']
+                self.reservoir = artifact['reservoir']
+                self.reservoir_seen = artifact['reservoir_seen']
+                self._install_model(artifact['model'], fingerprint[:16])
+                print("✅ Lead scoring model loaded from model store")
+                return
+
+            # Fit one encoder per categorical column
+            for col in categorical_cols:
+                if col in self.df.columns:
+                    self.encoders[col] = CategoryEncoder().fit(self.df[col])
 
-            # Encode categorical variables
-            categorical_cols = ['source', 'industry', 'region', 'stage']
+            # Encoded once and published to the shared feature cache for other processes
+            X = self.dataset_features()
+            y = self.df['converted']
 
-            for col in categorical_cols:
-                if col in df.columns:
-                    le = LabelEncoder()
-                    df[col + '_encoded'] = le.fit_transform(df[col].astype(str))
-                    self.label_encoders[col] = le
-
-            # Select features
-            feature_cols = [
-                'revenue_potential',
-                'days_to_convert',
-                'source_encoded',
-                'industry_encoded',
-                'region_encoded',
-                'stage_encoded'
-            ]
-
-            # Filter available features
-            available_features = [col for col in feature_cols if col in df.columns]
-
-            X = df[available_features]
-            y = df['converted']
-
-            # Train model
+            # Train model (scikit-learn is imported here, not at start-up: scoring runs on CompiledForest)
             if len(X) > 10:
+                from sklearn.ensemble import RandomForestClassifier
+                from sklearn.model_selection import train_test_split
+
                 X_train, X_test, y_train, y_test = train_test_split(
                     X, y, test_size=0.2, random_state=42
                 )
 
-                self.model = RandomForestClassifier(
+                model = RandomForestClassifier(
                     n_estimators=100,
                     random_state=42,
-                    max_depth=10
+                    max_depth=10,
+                    n_jobs=self.n_jobs
                 )
-                self.model.fit(X_train, y_train)
+                model.fit(X_train, y_train)
+                model.set_params(n_jobs=None)
+                self._install_model(model, fingerprint[:16])
 
                 accuracy = self.model.score(X_test, y_test)
                 print(f"✅ Lead scoring model trained with {accuracy * 100:.1f}% accuracy")
+
+                self.reservoir = None
+                self.reservoir_seen = 0
+                self._update_reservoir(X_train.assign(converted=y_train.to_numpy()))
+                self._save_model(fingerprint)
         except Exception as e:
             print(f"Error training lead scoring model: {e}")
 
+    def _update_reservoir(self, labeled):
+        """Fold encoded, labeled rows into the replay reservoir (Algorithm R, vectorized)"""
+        rng = np.random.default_rng(self.reservoir_seen)
+        labeled = labeled.reset_index(drop=True)
+        labeled = labeled.astype({col: np.float64 for col in labeled.columns if col != 'converted'})
+
+        if self.reservoir is None:
+            self.reservoir = labeled.iloc[:0].copy()
+
+        # Fill phase: take rows until the reservoir is full
+        free = max(self.RESERVOIR_SIZE - len(self.reservoir), 0)
+        self.reservoir = pd.concat([self.reservoir, labeled.iloc[:free]], ignore_index=True)
+        rest = labeled.iloc[free:]
+        seen = self.reservoir_seen + min(free, len(labeled))
+
+        # Replacement phase: row t replaces a random slot with probability size / (t + 1)
+        if len(rest):
+            slots = rng.integers(0, seen + np.arange(1, len(rest) + 1))
+            keep = slots < self.RESERVOIR_SIZE
+            for col in self.reservoir.columns:
+                values = self.reservoir[col].to_numpy().copy()
+                values[slots[keep]] = rest[col].to_numpy()[keep]
+                self.reservoir[col] = values
+
+        self.reservoir_seen = seen + len(rest)
+
+    def update_model(self, new_leads, n_new_trees=10, max_trees=300):
+        """
+        Incrementally grow the forest with newly labeled leads.
+
+        New trees are fit (warm_start) on the new rows plus the replay
+        reservoir, the oldest trees are dropped beyond max_trees, and the
+        updated forest is swapped in atomically so scoring never pauses.
+        """
+        if self.model is None:
+            print("⚠️ No lead scoring model to update; run a full training first")
+            return False
+
+        labeled = new_leads[(new_leads['converted'] == 1) | (new_leads['stage'] == 'Lost')]
+        if labeled.empty:
+            return False
+
+        with self._update_lock:
+            try:
+                new_rows = self._feature_frame(labeled).assign(converted=labeled['converted'].to_numpy())
+                fit_rows = pd.concat([self.reservoir, new_rows], ignore_index=True)
+                if fit_rows['converted'].nunique() < 2:
+                    print("⚠️ Incremental update needs both outcomes in the training window")
+                    return False
+
+                # Copy the estimator list so the served forest is untouched while we fit
+                model = copy.copy(self.model)
+                model.estimators_ = list(self.model.estimators_)
+                model.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_new_trees,
+                                 random_state=self.reservoir_seen)
+                model.fit(fit_rows.drop(columns='converted'), fit_rows['converted'])
+
+                model.estimators_ = model.estimators_[-max_trees:]
+                model.n_estimators = len(model.estimators_)
+
+                version = hashlib.sha256(
+                    f"{self.model_version}:{self.model_store.fingerprint(labeled, list(labeled.columns), {})}".encode()
+                ).hexdigest()[:16]
+                self._install_model(model, version)
+                self._update_reservoir(new_rows)
+
+                print(f"✅ Lead scoring model updated with {len(labeled)} labeled leads "
+                      f"({model.n_estimators} trees)")
+                return True
+            except Exception as e:
+                print(f"Error updating lead scoring model: {e}")
+                return False
+
+    def refresh(self, df=None):
+        """Pick up a refreshed dataset by learning only from leads labeled since the last fit"""
+        new_df = df if df is not None else get_dataset(self.dataset_path)
+
+        if self.model is None or self.df is None:
+            self.df = new_df
+            self._train_model()
+            return
+
+        previous = self.df.set_index('lead_id')[['converted', 'stage']]
+        current = new_df.set_index('lead_id')[['converted', 'stage']]
+        old_state = previous.reindex(current.index)
+        # Compare stages as plain values: the two versions may have different category sets
+        changed = ((old_state['converted'] != current['converted']) |
+                   (old_state['stage'].astype(object) != current['stage'].astype(object)))
+        newly_labeled = new_df[changed.to_numpy()]
+
+        self.df = new_df
+        if self.update_model(newly_labeled):
+            self._save_model(self.model_fingerprint(new_df))
+        self.hot_index = None
+
     def calculate_score(self, lead_data):
         """Calculate lead score (0-100)"""
         if self.model is None:
@@ -92,19 +232,15 @@ class LeadScorer:
             return self._rule_based_score(lead_data)
 
         try:
-            # Prepare features
+            # Prepare features (missing/unparseable numbers get the same defaults as _feature_frame)
             features = {}
-            features['revenue_potential'] = lead_data.get('revenue_potential', 0)
-            features['days_to_convert'] = lead_data.get('days_to_convert', 30)
+            features['revenue_potential'] = self._numeric_value(lead_data.get('revenue_potential'), 0)
+            features['days_to_convert'] = self._numeric_value(lead_data.get('days_to_convert'), 30)
 
-            # Encode categorical features
+            # Encode categorical features (unseen values fall into the unknown bucket)
             for col in ['source', 'industry', 'region', 'stage']:
-                if col in self.label_encoders:
-                    value = lead_data.get(col, 'Unknown')
-                    try:
-                        features[col + '_encoded'] = self.label_encoders[col].transform([value])[0]
-                    except:
-                        features[col + '_encoded'] = 0
+                if col in self.encoders:
+                    features[col + '_encoded'] = self.encoders[col].encode(lead_data.get(col, 'Unknown'))
 
             # Create feature array
             feature_array = [[
@@ -116,8 +252,8 @@ class LeadScorer:
                 features.get('stage_encoded', 0)
             ]]
 
-            # Predict probability
-            probability = self.model.predict_proba(feature_array)[0][1]
+            # Predict probability on the compiled forest (same output as sklearn, far less overhead)
+            probability = self.compiled_model.predict_proba(feature_array)[0][1]
             score = int(probability * 100)
 
             return min(max(score, 0), 100)
@@ -130,7 +266,7 @@ class LeadScorer:
         score = 50  # Base score
 
         # Revenue potential impact
-        revenue = lead_data.get('revenue_potential', 0)
+        revenue = self._numeric_value(lead_data.get('revenue_potential'), 0)
         if revenue > 60000:
             score += 25
         elif revenue > 45000:
@@ -161,100 +297,164 @@ class LeadScorer:
 
         return min(max(score, 0), 100)
 
-    def get_hot_leads(self, threshold=70):
+    @staticmethod
+    def _numeric_value(value, default):
+        """Single-value version of _numeric_column"""
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return default
+        return default if np.isnan(value) else value
+
+    @staticmethod
+    def _numeric_column(df, col, default):
+        """Numeric column with missing/unparseable values (or a missing column) set to default"""
+        if col not in df.columns:
+            return pd.Series(default, index=df.index, dtype=np.float64)
+        return pd.to_numeric(df[col], errors='coerce').fillna(default)
+
+    def _feature_frame(self, df):
+        """Build the model feature matrix for a whole frame of leads at once"""
+        features = pd.DataFrame(index=df.index)
+        features['revenue_potential'] = self._numeric_column(df, 'revenue_potential', 0)
+        features['days_to_convert'] = self._numeric_column(df, 'days_to_convert', 30)
+
+        for col in ['source', 'industry', 'region', 'stage']:
+            codes = np.full(len(df), CategoryEncoder.UNKNOWN, dtype=np.int64)
+            if col in self.encoders and col in df.columns:
+                codes = self.encoders[col].transform(df[col])
+            features[col + '_encoded'] = codes
+
+        return features[list(getattr(self.model, 'feature_names_in_', features.columns))]
+
+    def _rule_based_scores(self, df):
+        """Vectorized version of _rule_based_score"""
+        revenue = self._numeric_column(df, 'revenue_potential', 0).to_numpy()
+        stage = df.get('stage', pd.Series('', index=df.index)).to_numpy()
+        source = df.get('source', pd.Series('', index=df.index)).to_numpy()
+        industry = df.get('industry', pd.Series('', index=df.index))
+
+        score = np.full(len(df), 50)
+        score += np.select([revenue > 60000, revenue > 45000, revenue > 30000], [25, 15, 10], 0)
+        score += np.select([stage == 'Qualified', stage == 'Contacted'], [20, 10], 0)
+        score += np.select([source == 'Referral', source == 'LinkedIn'], [10, 5], 0)
+        score += np.where(industry.isin(['IT', 'Finance', 'Healthcare']).to_numpy(), 5, 0)
+        score[stage == 'Converted'] = 100
+
+        return np.clip(score, 0, 100)
+
+    def _features_fingerprint(self, df):
+        """Cache key for encoded features: the raw inputs plus the encoder vocabularies"""
+        return ModelStore.fingerprint(df, ['revenue_potential', 'days_to_convert'] + self.CATEGORICAL_COLS, {
+            'encoders': {col: encoder.categories_.tolist() for col, encoder in sorted(self.encoders.items())}
+        })
+
+    def dataset_features(self):
+        """Encoded feature matrix for the whole dataset, attached zero-copy from the feature cache"""
+        matrix, columns = self.feature_cache.get_or_build(
+            'lead_features', self._features_fingerprint(self.df), lambda: self._feature_frame(self.df)
+        )
+        return pd.DataFrame(matrix, columns=columns, index=self.df.index, copy=False)
+
+    def score_leads(self, df=None):
+        """Score a frame of leads in one pass, returning an int Series aligned with df"""
+        whole_dataset = df is None
+        if whole_dataset:
+            df = self.df
+        if df is None or df.empty:
+            return pd.Series([], dtype=np.int64)
+
+        if self.model is not None:
+            try:
+                features = self.dataset_features() if whole_dataset else self._feature_frame(df)
+                probability = self.model.predict_proba(features)[:, 1]
+                scores = np.clip((probability * 100).astype(np.int64), 0, 100)
+                return pd.Series(scores, index=df.index)
+            except Exception as e:
+                print(f"Error calculating ML scores: {e}")
+
+        return pd.Series(self._rule_based_scores(df), index=df.index)
+
+    def score_lead_batch(self, leads):
+        """Score a list of lead dicts with one model call (used by the micro-batching service)"""
+        return self.score_leads(pd.DataFrame(list(leads))).tolist()
+
+    def _build_hot_index(self):
+        """Score every lead once and index the unconverted ones by score"""
+        payloads = self.df[['lead_id', 'name', 'industry', 'revenue_potential']].rename(
+            columns={'lead_id': 'id', 'industry': 'company'}
+        ).assign(score=0)[['id', 'name', 'company', 'score', 'revenue_potential']].to_dict('records')
+
+        self.hot_index = HotLeadsIndex.build(
+            self.df['lead_id'].tolist(),
+            self.score_leads().to_numpy(),
+            converted=self.df['converted'].to_numpy(),
+            payloads=payloads
+        )
+
+    def get_hot_leads(self, threshold=70, limit=None):
         """Get leads with score above threshold"""
         if self.df is None or self.df.empty:
             return []
 
-        hot_leads = []
+        if self.hot_index is None:
+            self._build_hot_index()
+        return self.hot_index.get_hot_leads(threshold, limit)
 
-        for _, row in self.df.iterrows():
-            if row['converted'] == 0:  # Only unconverted leads
-                lead_data = {
-                    'revenue_potential': row['revenue_potential'],
-                    'days_to_convert': row.get('days_to_convert', 30),
-                    'source': row['source'],
-                    'industry': row['industry'],
-                    'region': row['region'],
-                    'stage': row['stage']
-                }
+    def get_hot_leads_count(self, threshold=70):
+        """Get count of hot leads"""
+        if self.df is None or self.df.empty:
+            return 0
 
-                score = self.calculate_score(lead_data)
+        if self.hot_index is None:
+            self._build_hot_index()
+        return self.hot_index.count_above(threshold)
 
-                if score >= threshold:
-                    hot_leads.append({
-                        'id': row['lead_id'],
-                        'name': row['name'],
-                        'company': row['industry'],
-                        'score': score,
-                        'revenue_potential': row['revenue_potential']
-                    })
+    def update_lead(self, lead_id, lead_data, converted=False):
+        """Rescore one lead and move it within the hot leads index"""
+        score = self.calculate_score(lead_data)
 
-        return sorted(hot_leads, key=lambda x: x['score'], reverse=True)
+        if self.hot_index is not None:
+            payload = {
+                'id': lead_id,
+                'name': lead_data.get('name'),
+                'company': lead_data.get('industry'),
+                'score': score,
+                'revenue_potential': lead_data.get('revenue_potential', 0)
+            }
+            self.hot_index.update(lead_id, score, converted=converted, payload=payload)
 
-    def get_hot_leads_count(self, threshold=70):
-        """Get count of hot leads"""
-        return len(self.get_hot_leads(threshold))
+        return score
 
     def score_all_leads(self):
         """Score all leads in the dataset"""
         if self.df is None or self.df.empty:
             return []
 
-        scored_leads = []
-
-        for _, row in self.df.iterrows():
-            lead_data = {
-                'revenue_potential': row['revenue_potential'],
-                'days_to_convert': row.get('days_to_convert', 30),
-                'source': row['source'],
-                'industry': row['industry'],
-                'region': row['region'],
-                'stage': row['stage']
-            }
-
-            score = self.calculate_score(lead_data)
-
-            scored_leads.append({
-                'lead_id': row['lead_id'],
-                'name': row['name'],
-                'email': row['email'],
-                'company': row['industry'],
-                'score': score,
-                'revenue_potential': row['revenue_potential'],
-                'stage': row['stage'],
-                'converted': row['converted'] == 1
-            })
-
-        return sorted(scored_leads, key=lambda x: x['score'], reverse=True)
+        scored = self.df.assign(score=self.score_leads())
+        scored = scored.sort_values('score', ascending=False, kind='stable')
+
+        return [{
+            'lead_id': row['lead_id'],
+            'name': row['name'],
+            'email': row['email'],
+            'company': row['industry'],
+            'score': int(row['score']),
+            'revenue_potential': row['revenue_potential'],
+            'stage': row['stage'],
+            'converted': row['converted'] == 1
+        } for row in scored[['lead_id', 'name', 'email', 'industry', 'score',
+                             'revenue_potential', 'stage', 'converted']].to_dict('records')]
 
     def get_score_distribution(self):
         """Get distribution of lead scores"""
         if self.df is None or self.df.empty:
             return {'Hot (70-100)': 0, 'Warm (40-69)': 0, 'Cold (0-39)': 0}
 
-        all_scores = []
-        for _, row in self.df.iterrows():
-            if row['converted'] == 0:  # Only unconverted leads
-                lead_data = {
-                    'revenue_potential': row['revenue_potential'],
-                    'days_to_convert': row.get('days_to_convert', 30),
-                    'source': row['source'],
-                    'industry': row['industry'],
-                    'region': row['region'],
-                    'stage': row['stage']
-                }
-                score = self.calculate_score(lead_data)
-                all_scores.append(score)
-
-        hot = sum(1 for s in all_scores if s >= 70)
-        warm = sum(1 for s in all_scores if 40 <= s < 70)
-        cold = sum(1 for s in all_scores if s < 40)
+        scores = self.score_leads()[self.df['converted'] == 0].to_numpy()  # Only unconverted leads
 
         return {
-            'Hot (70-100)': hot,
-            'Warm (40-69)': warm,
-            'Cold (0-39)': cold
+            'Hot (70-100)': int((scores >= 70).sum()),
+            'Warm (40-69)': int(((scores >= 40) & (scores < 70)).sum()),
+            'Cold (0-39)': int((scores < 40).sum())
         }
-
-
@@ -1,7 +1,5 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime, timedelta
 import warnings
 
@@ -212,6 +210,8 @@ class AnalyticsDashboard:
 
     def create_comprehensive_visualizations(self, metrics):
         """Create comprehensive dashboard visualizations"""
+        import matplotlib.pyplot as plt  # Plotting stack is loaded on first use only
+
         try:
             fig = plt.figure(figsize=(20, 16))
 
@@ -348,6 +348,8 @@ class AnalyticsDashboard:
 
     def create_simple_charts(self, metrics):
         """Create simple fallback charts"""
+        import matplotlib.pyplot as plt
+
         try:
             fig, axes = plt.subplots(2, 2, figsize=(12, 10))
 
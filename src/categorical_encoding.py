@@ -0,0 +1,61 @@
+"""
+Categorical Encoding - Exception-free category codes with an explicit unknown bucket
+"""
+import pandas as pd
+import numpy as np
+
+
+class CategoryEncoder:
+    """
+    Drop-in replacement for LabelEncoder on the scoring hot path.
+
+    Known categories get codes 1..n in sorted order; anything unseen at fit
+    time maps to UNKNOWN instead of raising. Missing values (NaN, None and
+    '') are never fitted as a category and always map to UNKNOWN.
+    """
+
+    UNKNOWN = 0
+
+    def __init__(self):
+        self.categories_ = np.array([], dtype=object)
+        self._codes = {}
+
+    @staticmethod
+    def _is_missing(value):
+        return value is None or value == '' or (isinstance(value, float) and np.isnan(value))
+
+    @staticmethod
+    def _labels(values):
+        """String labels of a column as an object array, with missing values as None"""
+        values = pd.Series(values, dtype=object)
+        missing = (values.isna() | (values == '')).to_numpy()
+        labels = values.astype(str).to_numpy(dtype=object)
+        labels[missing] = None
+        return labels
+
+    def fit(self, values):
+        """Learn the category vocabulary from a column"""
+        labels = self._labels(values)
+        self.categories_ = np.unique(labels[pd.notna(labels)])
+        self._codes = {category: code for code, category in enumerate(self.categories_, start=1)}
+        return self
+
+    def transform(self, values):
+        """Encode a whole column at once via pandas.Categorical codes"""
+        values = pd.Series(values)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Already categorical: encode each distinct category once, then gather by code
+            lookup = self.transform(pd.Series(list(values.cat.categories) + [np.nan], dtype=object))
+            return lookup[values.cat.codes.to_numpy()]  # code -1 (missing) picks the trailing NaN entry
+
+        codes = pd.Categorical(self._labels(values), categories=self.categories_).codes
+        return codes.astype(np.int64) + 1  # -1 (missing or not a category) lands in the unknown bucket
+
+    def fit_transform(self, values):
+        return self.fit(values).transform(values)
+
+    def encode(self, value):
+        """Encode a single value with one dict lookup"""
+        if self._is_missing(value):
+            return self.UNKNOWN
+        return self._codes.get(str(value), self.UNKNOWN)
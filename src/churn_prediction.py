@@ -3,14 +3,21 @@ Churn Prediction System - Updated to use Real Dataset
 """
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
 import os
+from dataset_registry import get_dataset
+from model_store import ModelStore
+from feature_cache import FeatureMatrixCache
 
 
 class ChurnPredictor:
-    def __init__(self, dataset_path='data/dataset.csv'):
+    ARTIFACT_NAME = 'churn_model'
+    FEATURES = ['tenure_months', 'avg_monthly_spend', 'satisfaction_score', 'num_support_tickets']
+
+    def __init__(self, dataset_path='data/dataset.csv', model_dir='models', n_jobs=None):
         self.dataset_path = dataset_path
+        self.model_store = ModelStore(model_dir)
+        self.feature_cache = FeatureMatrixCache(os.path.join(model_dir, 'features'))
+        self.n_jobs = n_jobs
         self.model = None
         self.df = None
         self.load_and_train()
@@ -19,7 +26,7 @@ class ChurnPredictor:
         """Load dataset and train churn prediction model"""
         try:
             if os.path.exists(self.dataset_path):
-                self.df = pd.read_csv(self.dataset_path)
+                self.df = get_dataset(self.dataset_path)
                 print(f"✅ Loaded dataset with {len(self.df)} records for churn prediction")
 
                 # Train model on converted customers only
@@ -34,25 +41,46 @@ class ChurnPredictor:
         except Exception as e:
             print(f"Error loading dataset for churn prediction: {e}")
 
+    @classmethod
+    def model_fingerprint(cls, df):
+        """Model-store key for training on this dataset's converted customers"""
+        return ModelStore.fingerprint(df[df['converted'] == 1], cls.FEATURES + ['churned'], {
+            'n_estimators': 50,
+            'random_state': 42
+        })
+
     def _train_model(self, df):
         """Train Random Forest model for churn prediction"""
         try:
-            # Prepare features
-            df['tenure_months'] = df['tenure_months'].fillna(0)
-            df['avg_monthly_spend'] = df['avg_monthly_spend'].fillna(0)
-            df['satisfaction_score'] = df['satisfaction_score'].fillna(7)
-            df['num_support_tickets'] = df['num_support_tickets'].fillna(0)
-
-            # Feature engineering
-            features = ['tenure_months', 'avg_monthly_spend', 'satisfaction_score', 'num_support_tickets']
-            X = df[features]
-            y = df['churned']
+            features = self.FEATURES
+            fingerprint = self.model_fingerprint(self.df)
+
+            artifact = self.model_store.load(self.ARTIFACT_NAME, fingerprint)
+            if artifact is not None:
+                self.model = artifact['model']
+                print("✅ Churn prediction model loaded from model store")
+                return
+
+            # Prepare features (shared with other processes through the feature cache)
+            matrix, columns = self.feature_cache.get_or_build('churn_features', fingerprint, lambda: df[features].fillna({
+                'tenure_months': 0,
+                'avg_monthly_spend': 0,
+                'satisfaction_score': 7,
+                'num_support_tickets': 0
+            }))
+            X = pd.DataFrame(matrix, columns=columns, copy=False)
+            y = df['churned'].to_numpy()
 
             # Train model
             if len(X) > 5:
-                self.model = RandomForestClassifier(n_estimators=50, random_state=42)
+                from sklearn.ensemble import RandomForestClassifier
+
+                self.model = RandomForestClassifier(n_estimators=50, random_state=42, n_jobs=self.n_jobs)
                 self.model.fit(X, y)
+                self.model.set_params(n_jobs=None)
                 print("✅ Churn prediction model trained successfully")
+
+                self.model_store.save(self.ARTIFACT_NAME, fingerprint, model=self.model)
         except Exception as e:
             print(f"Error training churn model: {e}")
 
@@ -118,11 +146,40 @@ class ChurnPredictor:
                 customer_data.get('num_support_tickets', 0)
             ]]
 
-            probability = self.model.predict_proba(features)[0][1]
+            probability = self.model.predict_proba(pd.DataFrame(features, columns=self.FEATURES))[0][1]
             return int(probability * 100)
         except:
             return 0
 
+    def predict_churn_risks(self, customers):
+        """Predict churn risk for many customers with one model call"""
+        if self.model is None:
+            return [self.predict_churn_risk(customer) for customer in customers]
+
+        # Rows are coerced one by one: a malformed customer scores 0, as predict_churn_risk does,
+        # without affecting the others in the batch
+        rows, valid = [], []
+        for customer in customers:
+            try:
+                rows.append([
+                    float(customer.get('tenure_months', 0)),
+                    float(customer.get('avg_monthly_spend', 0)),
+                    float(customer.get('satisfaction_score', 7)),
+                    float(customer.get('num_support_tickets', 0))
+                ])
+                valid.append(True)
+            except (AttributeError, TypeError, ValueError):
+                rows.append([0.0, 0.0, 7.0, 0.0])
+                valid.append(False)
+
+        try:
+            features = pd.DataFrame(rows, columns=self.FEATURES, dtype=np.float64)
+            probabilities = self.model.predict_proba(features)[:, 1]
+            return [int(probability * 100) if ok else 0 for probability, ok in zip(probabilities, valid)]
+        except Exception as e:
+            print(f"Error predicting churn risks: {e}")
+            return [0] * len(customers)
+
     def get_churn_distribution(self):
         """Get distribution of churn risk levels"""
         if self.df is None or self.df.empty:
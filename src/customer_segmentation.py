@@ -3,14 +3,19 @@ Customer Segmentation System - Updated to use Real Dataset
 """
 import pandas as pd
 import numpy as np
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
 import os
+from dataset_registry import get_dataset
+from model_store import ModelStore
 
 
 class CustomerSegmenter:
-    def __init__(self, dataset_path='data/dataset.csv'):
+    ARTIFACT_NAME = 'customer_segmenter'
+    FEATURES = ['avg_monthly_spend', 'revenue_potential', 'tenure_months']
+
+    def __init__(self, dataset_path='data/dataset.csv', model_dir='models', n_jobs=None):
         self.dataset_path = dataset_path
+        self.model_store = ModelStore(model_dir)
+        self.n_jobs = n_jobs
         self.model = None
         self.scaler = None
         self.df = None
@@ -21,7 +26,7 @@ class CustomerSegmenter:
         """Load dataset and perform K-Means clustering"""
         try:
             if os.path.exists(self.dataset_path):
-                self.df = pd.read_csv(self.dataset_path)
+                self.df = get_dataset(self.dataset_path)
                 print(f"✅ Loaded dataset with {len(self.df)} records for segmentation")
 
                 # Only segment converted customers
@@ -36,17 +41,40 @@ class CustomerSegmenter:
         except Exception as e:
             print(f"Error loading dataset for segmentation: {e}")
 
+    @classmethod
+    def model_fingerprint(cls, df):
+        """Model-store key for clustering this dataset's converted customers"""
+        return ModelStore.fingerprint(df[df['converted'] == 1], cls.FEATURES + ['name'], {
+            'n_clusters': 3,
+            'random_state': 42,
+            'n_init': 10
+        })
+
     def _perform_clustering(self, df):
         """Perform K-Means clustering on customer data"""
         try:
+            features = self.FEATURES
+            fingerprint = self.model_fingerprint(self.df)
+
+            artifact = self.model_store.load(self.ARTIFACT_NAME, fingerprint)
+            if artifact is not None:
+                self.model = artifact['model']
+                self.scaler = artifact['scaler']
+                self.segments = artifact['segments']
+                print("✅ Customer segments loaded from model store")
+                return
+
             # Prepare features
             df['avg_monthly_spend'] = df['avg_monthly_spend'].fillna(0)
             df['revenue_potential'] = df['revenue_potential'].fillna(0)
             df['tenure_months'] = df['tenure_months'].fillna(0)
 
-            # Features for clustering
-            features = ['avg_monthly_spend', 'revenue_potential', 'tenure_months']
-            X = df[features]
+            # Features for clustering (the dataset may hold them downcast to float32)
+            X = df[features].astype(np.float64)
+
+            from sklearn.cluster import KMeans
+            from sklearn.preprocessing import StandardScaler
+            from threadpoolctl import threadpool_limits
 
             # Standardize features
             self.scaler = StandardScaler()
@@ -55,12 +83,16 @@ class CustomerSegmenter:
             # K-Means clustering (3 segments)
             n_clusters = min(3, len(df))
             self.model = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-            df['segment'] = self.model.fit_predict(X_scaled)
+            with threadpool_limits(limits=self.n_jobs):  # KMeans parallelism is OpenMP/BLAS threads
+                df['segment'] = self.model.fit_predict(X_scaled)
 
             # Analyze segments
             self.segments = self._analyze_segments(df)
 
             print(f"✅ Created {n_clusters} customer segments")
+
+            self.model_store.save(self.ARTIFACT_NAME, fingerprint,
+                                  model=self.model, scaler=self.scaler, segments=self.segments)
         except Exception as e:
             print(f"Error performing clustering: {e}")
 
@@ -0,0 +1,193 @@
+"""
+Dataset Registry - Load-once, shared access to the CRM dataset
+"""
+import pandas as pd
+import numpy as np
+import threading
+import json
+import os
+
+# Shallow copies handed out by the registry share their column buffers with
+# the cached frame; copy-on-write makes any write on a copy private to it.
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+_datasets = {}
+_lock = threading.Lock()
+
+# Bump when the on-disk columnar layout changes
+COLUMNAR_FORMAT = 2
+
+# In-memory column types of the lead dataset. Columns not listed keep what
+# read_csv infers, with integers downcast to the smallest type that fits.
+# Money columns stay float64 so revenue totals keep full precision.
+LEAD_SCHEMA = {
+    'category': ['stage', 'industry', 'region', 'source', 'sales_rep', 'rep_id', 'status',
+                 'company_size', 'product_category'],
+    'datetime': ['created_date', 'close_date', 'last_login'],
+    'float32': ['days_to_convert', 'tenure_months', 'satisfaction_score', 'num_support_tickets']
+}
+
+
+def _to_float32(values):
+    """float32 copy of a numeric column, or the column itself if that would lose precision"""
+    narrow = values.astype(np.float32)
+    if (narrow.astype(values.dtype) == values)[values.notna()].all():
+        return narrow
+    return values
+
+
+def compact_frame(df, schema=LEAD_SCHEMA):
+    """Apply schema dtypes and downcast numerics, reporting the memory saved"""
+    before = df.memory_usage(deep=True).sum()
+    columns = {}
+    for col in df.columns:
+        values = df[col]
+        if col in schema['category']:
+            values = values.astype('category')
+        elif col in schema['datetime']:
+            parsed = pd.to_datetime(values, errors='coerce')
+            if (parsed.isna() & values.notna()).any():
+                print(f"⚠️ Keeping {col} as text: not every value parses as a date")
+            else:
+                values = parsed
+        elif col in schema['float32'] and values.dtype.kind == 'f':
+            values = _to_float32(values)
+        elif values.dtype.kind in 'iu':
+            values = pd.to_numeric(values, downcast='integer')
+        columns[col] = values
+
+    compact = pd.DataFrame(columns, index=df.index)
+    after = compact.memory_usage(deep=True).sum()
+    print(f"🗜️ Compacted {len(df)} rows: {before / 2**20:.1f} MB -> {after / 2**20:.1f} MB "
+          f"({(1 - after / max(before, 1)) * 100:.0f}% saved)")
+    return compact
+
+
+def date_str(value):
+    """Render a dataset date as the CSV text it came from ('' when missing)"""
+    if pd.isna(value):
+        return ''
+    if isinstance(value, pd.Timestamp):
+        return str(value.date()) if value == value.normalize() else str(value)
+    return str(value)
+
+
+def _columnar_dir(csv_path):
+    """data/dataset.csv is cached under data/.cache/dataset/"""
+    directory, filename = os.path.split(csv_path)
+    return os.path.join(directory, '.cache', os.path.splitext(filename)[0])
+
+
+def _source_stamp(csv_path):
+    stat = os.stat(csv_path)
+    return {'format': COLUMNAR_FORMAT, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def _read_columnar(csv_path):
+    """Memory-map the columnar cache of csv_path, or return None if it is missing or stale"""
+    cache_dir = _columnar_dir(csv_path)
+    try:
+        with open(os.path.join(cache_dir, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta['source'] != _source_stamp(csv_path):
+            return None
+
+        columns = {}
+        for i, col in enumerate(meta['columns']):
+            if meta['kinds'][i] == 'category':
+                codes = np.load(os.path.join(cache_dir, f"{i}.codes.npy"), mmap_mode='r')
+                categories = np.load(os.path.join(cache_dir, f"{i}.categories.npy"), allow_pickle=False)
+                columns[col] = pd.Categorical.from_codes(codes, categories)
+            elif meta['kinds'][i] == 'strings':
+                # Strings are stored dictionary-encoded: int32 codes + fixed-width unicode categories
+                codes = np.load(os.path.join(cache_dir, f"{i}.codes.npy"), mmap_mode='r')
+                categories = np.load(os.path.join(cache_dir, f"{i}.categories.npy")).astype(object)
+                columns[col] = pd.Categorical.from_codes(codes, categories).astype(meta['dtypes'][i])
+            else:
+                columns[col] = np.load(os.path.join(cache_dir, f"{i}.npy"), mmap_mode='r')
+
+        return pd.DataFrame(columns, columns=meta['columns'], copy=False)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _save(path, array):
+    """np.save to a temp name and rename: another process may have the old file memory-mapped"""
+    tmp_path = f"{path[:-4]}.{os.getpid()}.tmp.npy"
+    np.save(tmp_path, array)
+    os.replace(tmp_path, path)
+
+
+def _write_columnar(csv_path, df):
+    """Store each column of a freshly parsed CSV as a typed .npy file next to it"""
+    cache_dir = _columnar_dir(csv_path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Until the new meta.json lands, readers parse the CSV instead of mixing old and new columns
+        if os.path.exists(os.path.join(cache_dir, 'meta.json')):
+            os.remove(os.path.join(cache_dir, 'meta.json'))
+        kinds = []
+        for i, col in enumerate(df.columns):
+            values = df[col]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                categories = values.cat.categories.to_numpy()
+                _save(os.path.join(cache_dir, f"{i}.codes.npy"), values.cat.codes.to_numpy())
+                _save(os.path.join(cache_dir, f"{i}.categories.npy"),
+                      categories.astype(str) if categories.dtype == object else categories)
+                kinds.append('category')
+            elif values.dtype == object or pd.api.types.is_string_dtype(values):
+                codes, categories = pd.factorize(values)
+                _save(os.path.join(cache_dir, f"{i}.codes.npy"), codes.astype(np.int32))
+                _save(os.path.join(cache_dir, f"{i}.categories.npy"), np.asarray(categories, dtype=str))
+                kinds.append('strings')
+            else:
+                _save(os.path.join(cache_dir, f"{i}.npy"), values.to_numpy())
+                kinds.append('array')
+
+        # meta.json is written last: a cache without it is never read
+        tmp_path = os.path.join(cache_dir, f"meta.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'source': _source_stamp(csv_path),
+                'columns': list(df.columns),
+                'dtypes': [str(dtype) for dtype in df.dtypes],
+                'kinds': kinds
+            }, f)
+        os.replace(tmp_path, os.path.join(cache_dir, 'meta.json'))
+    except Exception as e:
+        print(f"⚠️ Could not write columnar cache for {csv_path}: {e}")
+
+
+def load_csv(csv_path):
+    """Parse and compact a CSV, going through its columnar cache when that is up to date"""
+    df = _read_columnar(csv_path)
+    if df is not None:
+        return df
+
+    df = compact_frame(pd.read_csv(csv_path))
+    _write_columnar(csv_path, df)
+    return df
+
+
+def get_dataset(dataset_path='data/dataset.csv'):
+    """Return a read-only view of the dataset, parsing the CSV at most once per version"""
+    key = os.path.abspath(dataset_path)
+    mtime = os.path.getmtime(key)
+
+    with _lock:
+        cached = _datasets.get(key)
+        if cached is None or cached[0] != mtime:
+            df = load_csv(key)
+            _datasets[key] = (mtime, df)
+            print(f"✅ Parsed dataset {key} ({len(df)} records)")
+        else:
+            df = cached[1]
+
+    return df.copy(deep=False)
+
+
+def clear_datasets():
+    """Drop all cached datasets so the next access re-reads from disk"""
+    with _lock:
+        _datasets.clear()
@@ -0,0 +1,67 @@
+"""
+Feature Cache - Memory-mapped feature matrices shared across processes
+"""
+import numpy as np
+import glob
+import json
+import os
+
+
+class FeatureMatrixCache:
+    """
+    Publishes encoded feature matrices as .npy files keyed by a fingerprint.
+
+    Any process (training workers, gunicorn workers, batch rescoring jobs)
+    can attach to a published matrix with np.load(mmap_mode='r'): the pages
+    come from the OS page cache and are shared, nothing is re-encoded.
+    """
+
+    def __init__(self, cache_dir='models/features'):
+        self.cache_dir = cache_dir
+
+    def _path(self, name, fingerprint):
+        return os.path.join(self.cache_dir, f"{name}-{fingerprint[:16]}.npy")
+
+    def attach(self, name, fingerprint):
+        """Return (read-only memmap, column names) for a published matrix, or None"""
+        path = self._path(name, fingerprint)
+        try:
+            with open(path[:-4] + '.json') as f:
+                columns = json.load(f)['columns']
+            return np.load(path, mmap_mode='r'), columns
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def publish(self, name, fingerprint, matrix, columns):
+        """Write a matrix for other processes to attach to; returns the memmap view"""
+        path = self._path(name, fingerprint)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path[:-4]}.{os.getpid()}.tmp.npy"
+            np.save(tmp_path, np.ascontiguousarray(matrix, dtype=np.float64))
+            os.replace(tmp_path, path)
+
+            with open(f"{tmp_path}.json", 'w') as f:
+                json.dump({'columns': list(columns), 'shape': list(np.shape(matrix))}, f)
+            os.replace(f"{tmp_path}.json", path[:-4] + '.json')
+
+            # Older versions can go: processes still attached keep their mapping alive
+            for stale in glob.glob(os.path.join(self.cache_dir, f"{name}-*.npy")):
+                if stale != path and '.tmp' not in stale:
+                    os.remove(stale)
+                    if os.path.exists(stale[:-4] + '.json'):
+                        os.remove(stale[:-4] + '.json')
+
+            return np.load(path, mmap_mode='r')
+        except Exception as e:
+            print(f"⚠️ Could not publish feature matrix {path}: {e}")
+            return np.asarray(matrix)
+
+    def get_or_build(self, name, fingerprint, build_fn):
+        """Attach to a published matrix, building and publishing it on a miss"""
+        cached = self.attach(name, fingerprint)
+        if cached is not None:
+            return cached
+
+        frame = build_fn()
+        return self.publish(name, fingerprint, frame.to_numpy(), frame.columns), list(frame.columns)
@@ -0,0 +1,99 @@
+"""
+Hot Leads Index - Incrementally maintained, score-ordered view of open leads
+"""
+from bisect import bisect_left, bisect_right, insort
+import numpy as np
+import threading
+
+
+class HotLeadsIndex:
+    """
+    Sorted array of (-score, seq, lead_id) entries for unconverted leads.
+
+    Lookups and threshold cuts are binary searches; updating one lead's score
+    or conversion status touches only that lead's entry. seq preserves the
+    original dataset order between leads with equal scores.
+    """
+
+    def __init__(self):
+        self._entries = []
+        self._scores = {}
+        self._seq = {}
+        self._payloads = {}
+        self._next_seq = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, lead_ids, scores, converted=None, payloads=None):
+        """Build the index in one sort from parallel arrays"""
+        index = cls()
+        lead_ids = list(lead_ids)
+        scores = np.asarray(scores)
+        is_open = np.ones(len(lead_ids), dtype=bool) if converted is None else np.asarray(converted) == 0
+
+        order = np.argsort(-scores, kind='stable')
+        order = order[is_open[order]]
+        ids = [lead_ids[pos] for pos in order.tolist()]
+        ranked = scores[order].tolist()
+
+        index._entries = [(-score, seq, lead_id) for score, seq, lead_id in zip(ranked, order.tolist(), ids)]
+        index._scores = dict(zip(ids, ranked))
+        index._seq = dict(zip(ids, order.tolist()))
+        if payloads is not None:
+            index._payloads = {lead_id: payloads[pos] for lead_id, pos in zip(ids, order.tolist())}
+
+        index._next_seq = len(lead_ids)
+        return index
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, lead_id):
+        if lead_id not in self._scores:
+            return
+        entry = (-self._scores.pop(lead_id), self._seq[lead_id], lead_id)
+        pos = bisect_left(self._entries, entry)
+        del self._entries[pos]
+
+    def update(self, lead_id, score=None, converted=False, payload=None):
+        """Re-position one lead after its score or conversion status changed"""
+        with self._lock:
+            if score is None:
+                score = self._scores.get(lead_id)
+            self._remove(lead_id)
+
+            if payload is not None:
+                self._payloads[lead_id] = payload
+
+            if converted or score is None:
+                self._payloads.pop(lead_id, None)
+                return
+
+            if lead_id not in self._seq:
+                self._seq[lead_id] = self._next_seq
+                self._next_seq += 1
+            self._scores[lead_id] = score
+            insort(self._entries, (-score, self._seq[lead_id], lead_id))
+
+    def remove(self, lead_id):
+        """Drop a lead from the index (e.g. deleted or converted)"""
+        self.update(lead_id, converted=True)
+
+    def count_above(self, threshold):
+        """Number of open leads with score >= threshold"""
+        with self._lock:
+            return bisect_right(self._entries, (-threshold, float('inf')))
+
+    def get_hot_leads(self, threshold=70, limit=None):
+        """Open leads with score >= threshold, highest first, without rescanning"""
+        with self._lock:
+            end = bisect_right(self._entries, (-threshold, float('inf')))
+            if limit is not None:
+                end = min(end, limit)
+
+            hot_leads = []
+            for neg_score, _, lead_id in self._entries[:end]:
+                lead = dict(self._payloads.get(lead_id, {'id': lead_id}))
+                lead['score'] = -neg_score
+                hot_leads.append(lead)
+            return hot_leads
@@ -0,0 +1,105 @@
+"""
+Inference Service - Micro-batching of concurrent single-row model calls
+"""
+from concurrent.futures import Future
+import threading
+import queue
+import time
+
+
+class BatchInferenceService:
+    """
+    Collects single-row requests from many threads and runs them as one batch.
+
+    batch_fn receives a list of rows and must return one result per row, in
+    order. A batch is dispatched once max_batch_size rows are waiting or the
+    oldest waiting row has waited max_wait_ms, whichever comes first.
+    If a batch raises, its rows are retried one at a time so that only the
+    requests that fail on their own get the exception.
+    """
+
+    def __init__(self, batch_fn, max_batch_size=64, max_wait_ms=5, name='inference'):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+        self._queue = queue.Queue()
+        self._worker = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._start_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name=f"{self.name}-batcher", daemon=True)
+                    self._worker.start()
+
+    def submit(self, row):
+        """Queue one row and return a Future for its result"""
+        if self._closed:
+            raise RuntimeError(f"{self.name} service is closed")
+
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((row, future))
+        return future
+
+    def predict(self, row, timeout=None):
+        """Blocking helper: submit one row and wait for its result"""
+        return self.submit(row).result(timeout)
+
+    def close(self):
+        """Stop the worker after the requests already queued have been served"""
+        self._closed = True
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join()
+
+    def _collect(self):
+        """Block for the first request, then gather more until the batch is full or the wait expires"""
+        first = self._queue.get()
+        if first is None:
+            return None
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # Finish this batch, then stop
+                break
+            batch.append(item)
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+
+            rows = [row for row, _ in batch]
+            futures = [future for _, future in batch]
+            try:
+                results = list(self.batch_fn(rows))
+                if len(results) != len(rows):
+                    raise ValueError(f"got {len(results)} results for {len(rows)} rows")
+                for future, result in zip(futures, results):
+                    future.set_result(result)
+            except Exception as e:
+                print(f"⚠️ {self.name} batch of {len(rows)} failed ({e}), retrying row by row")
+                self._run_rows(rows, futures)
+
+    def _run_rows(self, rows, futures):
+        for row, future in zip(rows, futures):
+            try:
+                future.set_result(self.batch_fn([row])[0])
+            except Exception as e:
+                future.set_exception(e)
@@ -0,0 +1,135 @@
+"""
+Lead Aggregates - Dashboard KPIs from conditional-aggregate scans of the leads table
+"""
+from sqlalchemy import func, case, text
+
+
+def count_where(condition):
+    """SUM(CASE WHEN condition THEN 1 ELSE 0 END): a filtered count inside a wider scan"""
+    return func.sum(case((condition, 1), else_=0))
+
+
+def lead_summary_query(session, Lead):
+    """GROUP BY (status, industry) with conditional aggregates; covered by ix_leads_status_industry"""
+    return session.query(
+        Lead.status,
+        Lead.industry,
+        func.count(Lead.id),
+        func.sum(Lead.deal_amount),
+        count_where(Lead.converted == 1),
+        count_where(Lead.churned == 1)
+    ).group_by(Lead.status, Lead.industry).order_by(Lead.status, Lead.industry)
+
+
+def lead_summary(session, Lead):
+    """
+    Lead totals plus per-status and per-industry counts from a single scan.
+
+    Groups by (status, industry) with conditional aggregates and derives
+    every total from the groups, so the endpoints that share it issue one
+    query instead of one per KPI.
+    """
+    rows = lead_summary_query(session, Lead).all()
+
+    summary = {
+        'total_leads': 0,
+        'total_revenue': 0,
+        'converted': 0,
+        'churned': 0,
+        'by_status': {},
+        'by_industry': {}
+    }
+    for status, industry, count, revenue, converted, churned in rows:
+        summary['total_leads'] += count or 0
+        summary['total_revenue'] += revenue or 0
+        summary['converted'] += converted or 0
+        summary['churned'] += churned or 0
+        summary['by_status'][status] = summary['by_status'].get(status, 0) + (count or 0)
+        summary['by_industry'][industry] = summary['by_industry'].get(industry, 0) + (count or 0)
+
+    return summary
+
+
+def rep_summary_query(session, Lead):
+    """Per-rep GROUP BY; covered by ix_leads_rep_converted_amount"""
+    return session.query(
+        Lead.sales_rep,
+        func.count(Lead.id),
+        count_where(Lead.converted == 1),
+        func.sum(Lead.deal_amount),
+        func.avg(Lead.performance_score),
+        func.count(Lead.performance_score)
+    ).group_by(Lead.sales_rep)
+
+
+def rep_summary(session, Lead):
+    """Per-rep leads, conversions, revenue and average performance from one grouped query"""
+    rows = rep_summary_query(session, Lead).all()
+
+    return [{
+        'name': rep,
+        'leads': count or 0,
+        'converted': converted or 0,
+        'revenue': revenue or 0,
+        'performance': performance,
+        'rated': rated or 0  # Rows with a performance score, to weight team-wide averages
+    } for rep, count, converted, revenue, performance, rated in rows]
+
+
+class SharedAggregates:
+    """
+    Per-request memo of lead_summary() and rep_summary().
+
+    Payloads built from the same instance share one scan of each, so a
+    response combining several of them costs no more queries than the
+    largest one alone.
+    """
+
+    def __init__(self, session, Lead):
+        self.session = session
+        self.Lead = Lead
+        self._lead_summary = None
+        self._rep_summary = None
+
+    def lead_summary(self):
+        if self._lead_summary is None:
+            self._lead_summary = lead_summary(self.session, self.Lead)
+        return self._lead_summary
+
+    def rep_summary(self):
+        if self._rep_summary is None:
+            self._rep_summary = rep_summary(self.session, self.Lead)
+        return self._rep_summary
+
+
+def team_totals(reps):
+    """Team-wide revenue and average performance derived from rep_summary() rows"""
+    rated = sum(rep['rated'] for rep in reps)
+    weighted = sum(rep['performance'] * rep['rated'] for rep in reps if rep['rated'])
+    return {
+        'total_revenue': sum(rep['revenue'] for rep in reps),
+        'avg_performance': weighted / rated if rated else None
+    }
+
+
+def query_plan(session, query):
+    """SQLite EXPLAIN QUERY PLAN detail lines for an ORM query"""
+    bind = session.get_bind()
+    sql = query.statement.compile(dialect=bind.dialect, compile_kwargs={'literal_binds': True})
+    return [row[-1] for row in session.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+
+def full_table_scans(session, queries):
+    """
+    Check that each named query reads the leads table through an index.
+
+    Returns {name: plan} for every query whose plan has a bare
+    'SCAN leads' step (a full table scan) instead of a SEARCH or an
+    index/covering-index scan.
+    """
+    failures = {}
+    for name, query in queries.items():
+        plan = query_plan(session, query)
+        if any(step.startswith('SCAN') and 'INDEX' not in step for step in plan):
+            failures[name] = plan
+    return failures
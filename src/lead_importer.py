@@ -0,0 +1,350 @@
+"""
+Lead Importer - Streaming, chunked CSV upserts and incremental re-syncs of the leads table
+"""
+from sqlalchemy import select, func, case, null, or_
+from sqlalchemy.dialects import sqlite, postgresql
+import pandas as pd
+import numpy as np
+import time
+import os
+
+# Value stored when a CSV cell is missing or blank (None stores NULL). Categorical model
+# features (stage, industry, region, source) stay NULL, which scoring reads as missing,
+# exactly like the blank cell the model was trained on.
+TEXT_DEFAULTS = {
+    'name': 'Unknown',
+    'stage': None,
+    'phone': '',
+    'company': '',
+    'industry': None,
+    'status': 'New',
+    'created_date': '',
+    'last_login': '',
+    'last_contact': '',
+    'notes': '',
+    'close_date': '',
+    'sales_rep': 'Unassigned',
+    'region': None,
+    'source': None,
+    'company_size': 'Medium',
+    'product_category': ''
+}
+
+# Numeric columns also take their default for a 0, as the row-by-row seeding did
+FLOAT_DEFAULTS = {
+    'score': 0.0,
+    'revenue_potential': 0.0,
+    'deal_amount': 0.0,
+    'performance_score': 75.0,
+    'avg_monthly_spend': 0.0
+}
+INTEGER_DEFAULTS = {'converted': 0, 'churned': 0}
+
+# Model features stored as NULL when missing, so scoring applies its own default (e.g. 30 days)
+NULLABLE_FLOATS = ['days_to_convert']
+
+IMPORT_COLUMNS = ['email', *TEXT_DEFAULTS, *FLOAT_DEFAULTS, *INTEGER_DEFAULTS, *NULLABLE_FLOATS]
+
+_UPSERT_INSERTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+
+_strip = np.frompyfunc(str.strip, 1, 1)
+
+
+def _count(table):
+    return select(func.count()).select_from(table)
+
+
+def _read_chunks(csv_path, chunk_size):
+    return pd.read_csv(csv_path, chunksize=chunk_size, dtype={col: str for col in ['email', *TEXT_DEFAULTS]})
+
+
+def _text_column(chunk, col, default):
+    if col not in chunk:
+        return pd.Series(default, index=chunk.index, dtype=object)
+    values = _strip(chunk[col].to_numpy(dtype=object, na_value=''))
+    if default != '':
+        values[values == ''] = default
+    return pd.Series(values, index=chunk.index, dtype=object)
+
+
+def coerce_chunk(chunk):
+    """
+    Validate and convert one CSV chunk column-wise.
+
+    Returns (leads, rejected): leads holds the valid rows with one column
+    per imported Lead field; rejected holds the 1-based data row number and
+    the reason of every row that was left out.
+    """
+    reasons = pd.Series('', index=chunk.index, dtype=object)
+
+    email = _text_column(chunk, 'email', '')
+    reasons = reasons.mask(email.isin(['', 'nan']), 'missing email')
+    columns = {'email': email}
+
+    for col, default in TEXT_DEFAULTS.items():
+        columns[col] = _text_column(chunk, col, default)
+
+    for col, default in {**FLOAT_DEFAULTS, **INTEGER_DEFAULTS, **dict.fromkeys(NULLABLE_FLOATS)}.items():
+        if col not in chunk:
+            columns[col] = pd.Series(default, index=chunk.index, dtype=None if default is not None else object)
+            continue
+        raw = chunk[col]
+        numbers = pd.to_numeric(raw, errors='coerce')
+        unparsed = numbers.isna() & raw.notna()
+        if unparsed.any():
+            invalid = pd.Series(False, index=chunk.index)
+            invalid[unparsed] = raw[unparsed].astype(str).str.strip() != ''
+            reasons = reasons.mask(invalid & (reasons == ''), f'invalid {col}')
+        if default is None:
+            columns[col] = numbers.astype(object).where(numbers.notna(), None)
+            continue
+        numbers = numbers.fillna(default).mask(numbers == 0, default)
+        columns[col] = numbers.astype('int64' if col in INTEGER_DEFAULTS else 'float64')
+
+    leads = pd.DataFrame(columns, index=chunk.index)
+    bad = reasons != ''
+    rejected = pd.DataFrame({'row': chunk.index[bad] + 1, 'email': email[bad], 'reason': reasons[bad]})
+    return leads[~bad], rejected
+
+
+def row_hashes(leads):
+    """
+    64-bit content hash of each coerced row (signed, to fit an SQL BIGINT).
+
+    Computed column-wise over every imported field and the import_source,
+    so a lead whose hash matches the stored one needs no write.
+    """
+    hashes = pd.util.hash_pandas_object(leads[[*IMPORT_COLUMNS, 'import_source']], index=False)
+    return hashes.to_numpy().view(np.int64)
+
+
+def upsert_statement(table, dialect_name, score_inputs=()):
+    """
+    INSERT ... ON CONFLICT(email) DO UPDATE for the imported columns.
+
+    An existing lead keeps its stored score; its score_version is cleared
+    (queuing it for rescoring) only when one of score_inputs changed. The
+    lead's import_source becomes the CSV written from.
+    """
+    insert = _UPSERT_INSERTS.get(dialect_name)
+    if insert is None:
+        raise ValueError(f"Upsert import is not supported on {dialect_name}")
+
+    stmt = insert(table)
+    excluded = stmt.excluded
+    updates = {col: excluded[col] for col in IMPORT_COLUMNS if col not in ('email', 'score')}
+    updates['row_hash'] = excluded.row_hash
+    updates['import_source'] = excluded.import_source
+    if score_inputs:
+        changed = or_(*(table.c[col].is_distinct_from(excluded[col]) for col in score_inputs))
+        updates['score_version'] = case((changed, null()), else_=table.c.score_version)
+    return stmt.on_conflict_do_update(index_elements=[table.c.email], set_=updates)
+
+
+class _Rejects:
+    """Counts rejected rows by reason and optionally appends them to a CSV"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.count = 0
+        self.reasons = {}
+        if path and os.path.exists(path):
+            os.remove(path)
+
+    def add(self, rejected):
+        self.count += len(rejected)
+        for reason, count in rejected['reason'].value_counts().items():
+            self.reasons[reason] = self.reasons.get(reason, 0) + int(count)
+        if self.path and len(rejected):
+            rejected.to_csv(self.path, mode='a', index=False, header=not os.path.exists(self.path))
+
+    def report(self):
+        for reason, count in sorted(self.reasons.items()):
+            print(f"⚠️ Rejected {count:,} rows: {reason}")
+        if self.path and self.count:
+            print(f"⚠️ Rejected rows written to {self.path}")
+
+
+def import_leads(engine, table, csv_path, score_inputs=(), chunk_size=50000, rejects_path=None):
+    """
+    Stream csv_path into table, upserting on email (csv_path is recorded as each lead's import_source).
+
+    Each chunk is validated column-wise, written with one executemany of
+    the upsert statement and committed, so memory stays bounded by
+    chunk_size and an interrupted import can simply be run again. Rejected
+    rows (including repeats of an email, whose first row wins) are counted
+    by reason and, with rejects_path, written to a CSV.
+    Returns {'read', 'written', 'inserted', 'rejected'} row counts.
+    """
+    stmt = upsert_statement(table, engine.dialect.name, score_inputs)
+    stats = {'read': 0, 'written': 0, 'inserted': 0, 'rejected': 0}
+    rejects = _Rejects(rejects_path)
+    taken = np.empty(0, dtype=np.uint64)
+    started = time.perf_counter()
+
+    with engine.connect() as conn:
+        rows_before = conn.execute(_count(table)).scalar()
+
+    for chunk in _read_chunks(csv_path, chunk_size):
+        leads, rejected = coerce_chunk(chunk)
+        leads, repeated, _, taken = _first_rows(leads, taken)
+        rejected = pd.concat([rejected, repeated], ignore_index=True)
+        if len(leads):
+            leads = leads.assign(import_source=csv_path)
+            with engine.begin() as conn:
+                conn.execute(stmt, leads.assign(row_hash=row_hashes(leads)).to_dict('records'))
+
+        stats['read'] += len(chunk)
+        stats['written'] += len(leads)
+        rejects.add(rejected)
+        stats['rejected'] = rejects.count
+
+        rate = stats['read'] / max(time.perf_counter() - started, 1e-9)
+        print(f"📥 {stats['read']:,} rows read: {stats['written']:,} upserted, "
+              f"{stats['rejected']:,} rejected ({rate:,.0f} rows/s)")
+
+    with engine.connect() as conn:
+        stats['inserted'] = conn.execute(_count(table)).scalar() - rows_before
+
+    rejects.report()
+    print(f"✅ Imported {stats['written']:,} leads ({stats['inserted']:,} new) "
+          f"in {time.perf_counter() - started:.1f}s")
+    return stats
+
+
+def email_keys(emails):
+    """64-bit hashes of email addresses, the keys leads are matched on during a sync"""
+    return pd.util.hash_array(np.asarray(emails, dtype=object))
+
+
+def _first_rows(leads, taken):
+    """
+    Keep the first row of each email in the whole CSV, as the row-by-row seeding did.
+
+    taken holds the sorted email keys of earlier chunks. Returns (leads,
+    rejected, keys of the kept leads, taken with those keys added); a single
+    upsert may not touch the same row twice (PostgreSQL refuses it).
+    """
+    keys = email_keys(leads['email'])
+    repeated = pd.Series(keys).duplicated().to_numpy()
+    if len(taken):
+        positions = np.minimum(np.searchsorted(taken, keys), len(taken) - 1)
+        repeated = repeated | (taken[positions] == keys)
+
+    rejected = pd.DataFrame({'row': leads.index[repeated] + 1, 'email': leads['email'][repeated],
+                             'reason': 'duplicate email'})
+    keys = keys[~repeated]
+    new = np.sort(keys)
+    return leads[~repeated], rejected, keys, np.insert(taken, np.searchsorted(taken, new), new)
+
+
+def _stored_hashes(conn, table, source, batch_size=100000):
+    """
+    (keys, row_hashes, known, ids, owned) of every stored lead, sorted by email key.
+
+    owned marks the leads last written from source. About 25 bytes per lead:
+    streamed in batches and kept as numpy arrays, never as one Python object
+    per row.
+    """
+    parts = []
+    result = conn.execution_options(yield_per=batch_size).execute(
+        select(table.c.id, table.c.email, table.c.row_hash, table.c.import_source == source))
+    for rows in result.partitions():
+        ids, emails, hashes, owned = zip(*rows)
+        parts.append((
+            email_keys(emails),
+            np.array([0 if h is None else h for h in hashes], dtype=np.int64),
+            np.array([h is not None for h in hashes], dtype=bool),
+            np.array(ids, dtype=np.int64),
+            np.array([bool(o) for o in owned], dtype=bool)
+        ))
+    if not parts:
+        return (np.empty(0, np.uint64), np.empty(0, np.int64), np.empty(0, bool), np.empty(0, np.int64),
+                np.empty(0, bool))
+
+    keys, hashes, known, ids, owned = (np.concatenate(arrays) for arrays in zip(*parts))
+    order = np.argsort(keys, kind='stable')
+    return keys[order], hashes[order], known[order], ids[order], owned[order]
+
+
+def _match(keys, hashes, known, chunk_keys, chunk_hashes):
+    """(stored, changed) masks of a chunk's rows against the sorted stored keys and hashes"""
+    if not len(keys):
+        stored = np.zeros(len(chunk_keys), dtype=bool)
+        return stored, ~stored
+    positions = np.minimum(np.searchsorted(keys, chunk_keys), len(keys) - 1)
+    stored = keys[positions] == chunk_keys
+    changed = ~stored | ~known[positions] | (hashes[positions] != chunk_hashes)
+    return stored, changed
+
+
+def sync_leads(engine, table, csv_path, score_inputs=(), chunk_size=50000, delete_missing=True,
+               rejects_path=None, delete_batch_size=900):
+    """
+    Bring table in line with csv_path, writing only the rows that differ.
+
+    The stored (email, row_hash) pairs are loaded once as sorted 64-bit
+    keys; each coerced CSV chunk is then hashed (row_hashes) and matched
+    against them in numpy, and only new and changed rows are upserted.
+    Afterwards, leads last written from this CSV whose email no longer
+    appears in it are deleted (unless delete_missing is False); leads from
+    other CSVs or created in the app are never deleted. Rejected CSV rows
+    leave their lead untouched. Returns {'read', 'inserted', 'updated', 'unchanged',
+    'deleted', 'rejected'} row counts.
+    """
+    stmt = upsert_statement(table, engine.dialect.name, score_inputs)
+    stats = {'read': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0, 'deleted': 0, 'rejected': 0}
+    rejects = _Rejects(rejects_path)
+    started = time.perf_counter()
+
+    with engine.connect() as conn:
+        keys, hashes, known, ids, owned = _stored_hashes(conn, table, csv_path)
+    print(f"🔄 Loaded {len(keys):,} stored lead hashes in {time.perf_counter() - started:.1f}s")
+
+    seen = []  # Email keys of every CSV row, valid or rejected
+    taken = np.empty(0, dtype=np.uint64)  # Sorted email keys of the leads read so far
+
+    for chunk in _read_chunks(csv_path, chunk_size):
+        leads, rejected = coerce_chunk(chunk)
+        leads, repeated, chunk_keys, taken = _first_rows(leads, taken)
+        rejected = pd.concat([rejected, repeated], ignore_index=True)
+        rejects.add(rejected)
+        stats['read'] += len(chunk)
+        stats['rejected'] = rejects.count
+
+        leads = leads.assign(import_source=csv_path)
+        leads = leads.assign(row_hash=row_hashes(leads))
+        seen.append(chunk_keys)
+        seen.append(email_keys(rejected['email'][~rejected['email'].isin(['', 'nan'])]))
+
+        stored, changed = _match(keys, hashes, known, chunk_keys, leads['row_hash'].to_numpy())
+        pending = leads[changed]
+        if len(pending):
+            with engine.begin() as conn:
+                conn.execute(stmt, pending.to_dict('records'))
+
+        inserted = int((changed & ~stored).sum())
+        stats['inserted'] += inserted
+        stats['updated'] += len(pending) - inserted
+        stats['unchanged'] += len(leads) - len(pending)
+
+        rate = stats['read'] / max(time.perf_counter() - started, 1e-9)
+        print(f"🔄 {stats['read']:,} rows read: {stats['inserted']:,} new, {stats['updated']:,} changed, "
+              f"{stats['rejected']:,} rejected ({rate:,.0f} rows/s)")
+
+    # An empty export is far more likely a broken one than a request to drop every lead
+    if delete_missing and stats['read'] and owned.any():
+        missing = ids[owned & ~np.isin(keys, np.concatenate(seen))].tolist()
+        if missing:
+            with engine.begin() as conn:
+                for i in range(0, len(missing), delete_batch_size):
+                    batch = missing[i:i + delete_batch_size]
+                    # Re-checked at delete time: another import may have claimed a lead since it was loaded
+                    stats['deleted'] += conn.execute(table.delete().where(
+                        table.c.id.in_(batch), table.c.import_source == csv_path)).rowcount
+
+    rejects.report()
+    print(f"✅ Synced {csv_path}: {stats['inserted']:,} new, {stats['updated']:,} changed, "
+          f"{stats['deleted']:,} deleted, {stats['unchanged']:,} unchanged "
+          f"in {time.perf_counter() - started:.1f}s")
+    return stats
@@ -2,21 +2,26 @@
 Lead Management System - Updated to use Real Dataset
 """
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 import os
+from dataset_registry import get_dataset, date_str
+from hot_leads_index import HotLeadsIndex
 
 
 class LeadManager:
     def __init__(self, dataset_path='data/dataset.csv'):
         self.dataset_path = dataset_path
         self.leads_df = None
+        self._revenue_index = None
+        self._revenue_index_df = None
         self.load_dataset()
 
     def load_dataset(self):
         """Load real dataset from CSV"""
         try:
             if os.path.exists(self.dataset_path):
-                self.leads_df = pd.read_csv(self.dataset_path)
+                self.leads_df = get_dataset(self.dataset_path)
                 print(f"✅ Loaded {len(self.leads_df)} leads from dataset")
             else:
                 print(f"❌ Dataset not found at {self.dataset_path}")
@@ -41,7 +46,7 @@ class LeadManager:
                 'status': row['stage'],
                 'score': int(row['revenue_potential'] / 1000) if pd.notna(row['revenue_potential']) else 0,
                 'revenue_potential': row['revenue_potential'],
-                'created_date': row.get('created_date', ''),
+                'created_date': date_str(row.get('created_date', '')),
                 'converted': row['converted'] == 1
             })
         return leads
@@ -65,7 +70,7 @@ class LeadManager:
             'status': row['stage'],
             'score': int(row['revenue_potential'] / 1000) if pd.notna(row['revenue_potential']) else 0,
             'revenue_potential': row['revenue_potential'],
-            'created_date': row.get('created_date', ''),
+            'created_date': date_str(row.get('created_date', '')),
             'converted': row['converted'] == 1
         }
 
@@ -74,11 +79,16 @@ class LeadManager:
         if self.leads_df is None or self.leads_df.empty:
             return []
 
-        hot_leads = self.leads_df[
-            (self.leads_df['revenue_potential'] >= threshold) &
-            (self.leads_df['converted'] == 0)
-            ]
-        return len(hot_leads)
+        # Index open leads by revenue once per loaded frame; each call is then a binary search
+        if self._revenue_index is None or self._revenue_index_df is not self.leads_df:
+            self._revenue_index = HotLeadsIndex.build(
+                self.leads_df['lead_id'].tolist(),
+                self.leads_df['revenue_potential'].fillna(-np.inf).to_numpy(),
+                converted=self.leads_df['converted'].to_numpy()
+            )
+            self._revenue_index_df = self.leads_df
+
+        return self._revenue_index.count_above(threshold)
 
     def get_conversion_rate(self):
         """Calculate conversion rate from dataset"""
@@ -121,21 +131,21 @@ class LeadManager:
                     'lead_name': row['name'],
                     'company': row['industry'],
                     'amount': row['deal_amount'],
-                    'timestamp': row['last_login']
+                    'timestamp': date_str(row['last_login'])
                 })
             elif row['stage'] == 'Qualified':
                 activities.append({
                     'type': 'qualified',
                     'lead_name': row['name'],
                     'company': row['industry'],
-                    'timestamp': row['last_login']
+                    'timestamp': date_str(row['last_login'])
                 })
             elif row['stage'] == 'Contacted':
                 activities.append({
                     'type': 'contact',
                     'lead_name': row['name'],
                     'company': row['industry'],
-                    'timestamp': row['last_login']
+                    'timestamp': date_str(row['last_login'])
                 })
 
         return activities[:limit]
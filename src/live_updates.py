@@ -0,0 +1,157 @@
+"""
+Live Updates - Socket.IO push of dashboard aggregates to subscribed rooms
+"""
+from flask import request
+from flask_login import current_user
+import threading
+import time
+
+try:
+    from flask_socketio import SocketIO, join_room, leave_room, emit
+except ImportError:  # Optional: without Socket.IO the dashboards keep polling the JSON APIs
+    SocketIO = None
+
+REP_ROOM_PREFIX = 'rep:'
+
+
+class LiveUpdatePublisher:
+    """
+    Broadcasts dashboard payloads to Socket.IO rooms.
+
+    Rooms are 'dashboard', 'team', 'analytics' (one payload function each)
+    and 'rep:<name>' (one entry of rep_payloads_fn()). Payloads are computed
+    once per change (mark_dirty) or once per refresh interval for every room
+    that has subscribers, never once per client, and each broadcast carries
+    only the top-level sections that changed since the previous one.
+    """
+
+    def __init__(self, socketio, app, payload_fns, rep_payloads_fn=None, tick=1.0, refresh_interval=30):
+        self.socketio = socketio
+        self.app = app
+        self.payload_fns = payload_fns
+        self.rep_payloads_fn = rep_payloads_fn
+        self.tick = tick
+        self.refresh_interval = refresh_interval
+        self.version = 0
+        self._dirty = threading.Event()
+        self._last = {}  # room -> payload last broadcast to it
+        self._members = {}  # sid -> rooms it joined
+        self._lock = threading.Lock()
+        self._task = None
+
+    def mark_dirty(self):
+        """Lead data changed: recompute and broadcast on the next tick"""
+        self._dirty.set()
+
+    def is_room(self, room):
+        if room in self.payload_fns:
+            return True
+        return self.rep_payloads_fn is not None and room.startswith(REP_ROOM_PREFIX)
+
+    def rooms(self):
+        """Rooms that currently have at least one subscriber"""
+        with self._lock:
+            return set().union(*self._members.values())
+
+    def _payloads(self, rooms):
+        """Compute the payload of each room, sharing one rep query between all rep rooms"""
+        payloads = {room: self.payload_fns[room]() for room in rooms if room in self.payload_fns}
+        rep_rooms = [room for room in rooms if room.startswith(REP_ROOM_PREFIX)]
+        if rep_rooms:
+            reps = self.rep_payloads_fn()
+            for room in rep_rooms:
+                payloads[room] = reps.get(room[len(REP_ROOM_PREFIX):])
+        return payloads
+
+    def subscribe(self, sid, room):
+        """Join room and return its current payload as the client's starting snapshot"""
+        if not self.is_room(room):
+            return None
+
+        active = room in self.rooms()
+        join_room(room)
+        with self._lock:
+            self._members.setdefault(sid, set()).add(room)
+        self._ensure_task()
+
+        # Rooms with subscribers are kept current by the publisher; others are computed once now
+        if active and room in self._last and not self._dirty.is_set():
+            return self._last[room]
+        payload = self._payloads([room])[room]
+        # _last is what existing subscribers were last sent: replacing it with a fresher
+        # snapshot would hide a pending change from the next broadcast
+        if not active or room not in self._last:
+            self._last[room] = payload
+        return payload
+
+    def unsubscribe(self, sid, room=None):
+        """Leave one room, or every room when the client disconnects"""
+        with self._lock:
+            joined = self._members.get(sid, set())
+            for name in ([room] if room else list(joined)):
+                joined.discard(name)
+                if room:
+                    leave_room(name)
+            if not joined:
+                self._members.pop(sid, None)
+
+    def publish(self):
+        """Recompute every subscribed room once and broadcast the sections that changed"""
+        rooms = self.rooms()
+        if not rooms:
+            return
+
+        for room, payload in self._payloads(rooms).items():
+            if payload is None:
+                continue
+            previous = self._last.get(room) or {}
+            changes = {section: value for section, value in payload.items() if previous.get(section) != value}
+            self._last[room] = payload
+            if changes:
+                self.version += 1
+                self.socketio.emit('update', {'room': room, 'version': self.version, 'changes': changes}, to=room)
+
+    def _ensure_task(self):
+        with self._lock:
+            if self._task is None:
+                self._task = self.socketio.start_background_task(self._run)
+
+    def _run(self):
+        last_refresh = time.monotonic()
+        while True:
+            self.socketio.sleep(self.tick)
+            due = time.monotonic() - last_refresh >= self.refresh_interval
+            if not (self._dirty.is_set() or due):
+                continue
+
+            # Periodic refreshes pick up writes made by other worker processes
+            self._dirty.clear()
+            last_refresh = time.monotonic()
+            try:
+                with self.app.app_context():
+                    self.publish()
+            except Exception as e:
+                print(f"⚠️ Live update broadcast failed: {e}")
+
+
+def register_handlers(socketio, publisher):
+    """Socket.IO events: authenticated clients subscribe to rooms and get a snapshot back"""
+
+    @socketio.on('connect')
+    def on_connect(auth=None):
+        return bool(current_user.is_authenticated)  # False rejects the connection
+
+    @socketio.on('subscribe')
+    def on_subscribe(data):
+        room = str((data or {}).get('room', ''))
+        snapshot = publisher.subscribe(request.sid, room)
+        if snapshot is not None:
+            emit('snapshot', {'room': room, 'version': publisher.version, 'data': snapshot})
+
+    @socketio.on('unsubscribe')
+    def on_unsubscribe(data):
+        publisher.unsubscribe(request.sid, str((data or {}).get('room', '')))
+
+    @socketio.on('disconnect')
+    def on_disconnect(*args):
+        publisher.unsubscribe(request.sid)
@@ -0,0 +1,89 @@
+"""
+Model Store - Persisted, fingerprinted model artifacts
+"""
+import pandas as pd
+import hashlib
+from datetime import datetime
+import pickle
+import json
+import os
+
+# Bump when the layout of stored artifacts changes
+ARTIFACT_FORMAT = 1
+
+
+class ModelStore:
+    def __init__(self, model_dir='models'):
+        self.model_dir = model_dir
+
+    @staticmethod
+    def fingerprint(df, columns, schema):
+        """Hash the training data and feature schema into a model version key"""
+        import sklearn  # Deferred: importing scikit-learn costs about a second of start-up
+
+        columns = [col for col in columns if col in df.columns]
+        digest = hashlib.sha256()
+        digest.update(json.dumps({
+            'format': ARTIFACT_FORMAT,
+            'sklearn': sklearn.__version__,
+            'columns': columns,
+            'schema': schema
+        }, sort_keys=True, default=str).encode())
+
+        if columns:
+            digest.update(pd.util.hash_pandas_object(df[columns], index=False).to_numpy().tobytes())
+
+        return digest.hexdigest()
+
+    def _path(self, name):
+        return os.path.join(self.model_dir, f"{name}.pkl")
+
+    def _meta_path(self, name):
+        return os.path.join(self.model_dir, f"{name}.json")
+
+    def has(self, name, fingerprint):
+        """Cheap freshness check from the metadata sidecar, without unpickling the model"""
+        try:
+            with open(self._meta_path(name)) as f:
+                return json.load(f).get('fingerprint') == fingerprint and os.path.exists(self._path(name))
+        except (OSError, ValueError):
+            return False
+
+    def load(self, name, fingerprint):
+        """Return the stored artifact dict if it was built from the same fingerprint"""
+        path = self._path(name)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, 'rb') as f:
+                artifact = pickle.load(f)
+        except Exception as e:
+            print(f"⚠️ Could not read model artifact {path}: {e}")
+            return None
+
+        if not isinstance(artifact, dict) or artifact.get('fingerprint') != fingerprint:
+            return None
+
+        return artifact
+
+    def save(self, name, fingerprint, **artifact):
+        """Persist a fitted model and its preprocessors under the given fingerprint"""
+        path = self._path(name)
+        try:
+            os.makedirs(self.model_dir, exist_ok=True)
+            artifact['fingerprint'] = fingerprint
+
+            # Write to a temp file first so concurrent workers never see a partial pickle
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+
+            with open(tmp_path, 'w') as f:
+                json.dump({'fingerprint': fingerprint, 'saved_at': datetime.now().isoformat()}, f)
+            os.replace(tmp_path, self._meta_path(name))
+            return True
+        except Exception as e:
+            print(f"⚠️ Could not save model artifact {path}: {e}")
+            return False
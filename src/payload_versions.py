@@ -0,0 +1,66 @@
+"""
+Payload Versions - Per-section change tracking for delta (?since=<version>) API responses
+"""
+import threading
+from collections import deque
+
+
+class SectionVersions:
+    """
+    Remembers, per payload, the data version at which each top-level section last changed.
+
+    Versions come from a data-change counter shared by every worker process.
+    A section whose value differs from the one this process saw last is
+    stamped with the version it was computed at, and so is every section of
+    a payload seen for the first time: a delta may resend an unchanged
+    section, but never leaves out a changed one.
+
+    Those stamps only describe a client's copy if it was computed at a version
+    this process also observed; a client that got its version from another
+    worker (or from a version this process never saw) gets the full payload.
+    """
+
+    def __init__(self, history=256):
+        self._states = {}  # name -> {'version', 'payload', 'changed_at', 'observed'}
+        self._history = history
+        self._lock = threading.Lock()
+
+    def current(self, name, version):
+        """The tracked state of a payload if it was computed at version, else None"""
+        with self._lock:
+            state = self._states.get(name)
+        return state if state is not None and state['version'] == version else None
+
+    def observe(self, name, version, payload):
+        """Record a payload computed at version and return its state"""
+        with self._lock:
+            previous = self._states.get(name)
+            changed_at = {}
+            for section, value in payload.items():
+                if previous is not None and section in previous['payload'] and previous['payload'][section] == value:
+                    changed_at[section] = previous['changed_at'][section]
+                else:
+                    changed_at[section] = version
+
+            if previous is not None and previous['version'] == version:
+                observed = previous['observed']
+            else:
+                observed = deque(previous['observed'] if previous is not None else (), maxlen=self._history)
+                observed.append(version)
+
+            state = {'version': version, 'payload': payload, 'changed_at': changed_at,
+                     'observed': observed}
+            # A slower request may finish after one computed at a newer version; keep the newer state
+            if previous is None or previous['version'] <= version:
+                self._states[name] = state
+            return state
+
+    @staticmethod
+    def delta(state, since):
+        """Sections of state that changed after version since"""
+        if since > state['version'] or since not in state['observed']:
+            # The client is ahead of the counter (e.g. a database reset), or its copy was computed
+            # at a version this process never saw, so changes back and forth may be missing: resend everything
+            return dict(state['payload'])
+        return {section: state['payload'][section]
+                for section, version in state['changed_at'].items() if version > since}
@@ -0,0 +1,98 @@
+"""
+Response Cache - TTL cache of rendered API responses with write-based invalidation
+"""
+import threading
+import hashlib
+import time
+
+
+class ResponseCache:
+    """
+    Caches rendered response bodies per key for ttl seconds.
+
+    invalidate() bumps a generation counter instead of walking the entries,
+    so a write costs O(1) and every entry rendered before it is treated as
+    expired. Concurrent misses on the same key are computed once: the other
+    callers wait for that result instead of each hitting the database.
+
+    At most max_entries responses are kept (oldest dropped first), and a
+    key's lock only exists while it is being rendered, so keys that vary
+    per client (e.g. ?since=<version>) cannot grow the cache without bound.
+    """
+
+    def __init__(self, ttl=30, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.generation = 0
+        self._entries = {}  # insertion ordered: the first entry is the oldest
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def etag_for(body):
+        return hashlib.sha256(body).hexdigest()[:32]
+
+    def _fresh(self, key):
+        entry = self._entries.get(key)
+        if entry is not None and entry['generation'] == self.generation and entry['expires_at'] > time.monotonic():
+            return entry
+        return None
+
+    def get_or_render(self, key, render_fn):
+        """
+        Return the cached entry for key, calling render_fn() on a miss.
+
+        render_fn returns (body bytes, status, mimetype, cacheable). Entries are
+        dicts with body, status, mimetype, etag and cacheable; only cacheable
+        200 responses are stored.
+        """
+        entry = self._fresh(key)
+        if entry is not None:
+            return entry
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            entry = self._fresh(key)  # Another request may have rendered it while we waited
+            if entry is not None:
+                return entry
+
+            generation = self.generation
+            try:
+                body, status, mimetype, cacheable = render_fn()
+            finally:
+                with self._lock:
+                    # Callers already waiting hold the lock object; later ones find the entry
+                    if self._key_locks.get(key) is key_lock:
+                        del self._key_locks[key]
+
+            entry = {
+                'body': body,
+                'status': status,
+                'mimetype': mimetype,
+                'etag': self.etag_for(body),
+                'cacheable': cacheable,
+                'generation': generation,
+                'expires_at': time.monotonic() + self.ttl
+            }
+            if status == 200 and cacheable:
+                self._store(key, entry)
+            return entry
+
+    def _store(self, key, entry):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            now = time.monotonic()
+            for stale in [k for k, e in self._entries.items()
+                          if e['generation'] != self.generation or e['expires_at'] <= now]:
+                del self._entries[stale]
+            while len(self._entries) > self.max_entries:
+                del self._entries[next(iter(self._entries))]
+
+    def invalidate(self):
+        """Expire every entry (called whenever lead data is written)"""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
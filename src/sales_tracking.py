@@ -1,9 +1,5 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import StandardScaler
 from datetime import datetime, timedelta
 import pickle
 import os
@@ -13,7 +9,7 @@ class SalesTracker:
     def __init__(self, model_path='models/sales_forecast_model.pkl'):
         self.model_path = model_path
         self.forecast_model = None
-        self.scaler = StandardScaler()
+        self.scaler = None
         self.is_trained = False
 
     def load_real_deals_from_dataset(self, df):
@@ -193,7 +189,12 @@ class SalesTracker:
             X = monthly_data[['month_index', 'deal_count']].values
             y = monthly_data['revenue'].values
 
+            # scikit-learn is only needed once a forecast is actually trained
+            from sklearn.linear_model import LinearRegression
+            from sklearn.preprocessing import StandardScaler
+
             # Scale features
+            self.scaler = StandardScaler()
             X_scaled = self.scaler.fit_transform(X)
 
             # Train model
@@ -288,6 +289,8 @@ class SalesTracker:
 
     def visualize_sales_data(self, deals_df, leads_df):
         """Create sales visualizations"""
+        import matplotlib.pyplot as plt  # Plotting stack is loaded on first use only
+
         try:
             fig, axes = plt.subplots(2, 2, figsize=(15, 12))
 
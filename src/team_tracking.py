@@ -5,6 +5,7 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import os
+from dataset_registry import get_dataset, date_str
 
 
 class TeamTracker:
@@ -17,7 +18,7 @@ class TeamTracker:
         """Load real dataset from CSV"""
         try:
             if os.path.exists(self.dataset_path):
-                self.df = pd.read_csv(self.dataset_path)
+                self.df = get_dataset(self.dataset_path)
                 print(f"✅ Loaded dataset with {len(self.df)} records for team tracking")
             else:
                 print(f"❌ Dataset not found at {self.dataset_path}")
@@ -158,7 +159,7 @@ class TeamTracker:
                 'lead': row['name'],
                 'company': row['industry'],
                 'amount': row['deal_amount'],
-                'timestamp': row['close_date']
+                'timestamp': date_str(row['close_date'])
             })
 
         # Recent qualifications
@@ -173,7 +174,7 @@ class TeamTracker:
                 'rep': row['sales_rep'],
                 'lead': row['name'],
                 'company': row['industry'],
-                'timestamp': row['last_login']
+                'timestamp': date_str(row['last_login'])
             })
 
         return activities[:limit]
@@ -0,0 +1,106 @@
+"""
+Training Orchestrator - Fit the ML models side by side in a process pool
+"""
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import threading
+import time
+import os
+from dataset_registry import get_dataset
+from model_store import ModelStore
+from ai_lead_scoring import LeadScorer
+from churn_prediction import ChurnPredictor
+from customer_segmentation import CustomerSegmenter
+
+MODEL_CLASSES = {
+    LeadScorer.ARTIFACT_NAME: LeadScorer,
+    ChurnPredictor.ARTIFACT_NAME: ChurnPredictor,
+    CustomerSegmenter.ARTIFACT_NAME: CustomerSegmenter
+}
+
+# Relative share of the machine each model gets (roughly its training cost)
+CORE_SHARES = {
+    LeadScorer.ARTIFACT_NAME: 0.5,
+    ChurnPredictor.ARTIFACT_NAME: 0.3,
+    CustomerSegmenter.ARTIFACT_NAME: 0.2
+}
+
+
+def core_budgets(names, total_cores=None):
+    """Split the available cores between the models being trained (at least one each)"""
+    total_cores = total_cores or os.cpu_count() or 1
+    weight = sum(CORE_SHARES[name] for name in names) or 1
+    return {name: max(1, int(total_cores * CORE_SHARES[name] / weight)) for name in names}
+
+
+def _pool_context():
+    """
+    The fork context if the models can be fitted in a process pool from here, else None.
+
+    fork shares the already-parsed dataset with the workers but is only safe from a
+    single-threaded process (the preloading gunicorn master, the CLI): next to serving
+    threads a child can inherit a held lock. spawn/forkserver are no way out, as their
+    children re-import __main__, which for `python src/web_dashboard.py` is the app itself.
+    """
+    if 'fork' in multiprocessing.get_all_start_methods() and threading.active_count() == 1:
+        return multiprocessing.get_context('fork')
+    return None
+
+
+def _fit_model(name, dataset_path, model_dir, n_jobs):
+    """Worker entry point: build the model (which trains and saves it) and time it"""
+    start = time.perf_counter()
+    MODEL_CLASSES[name](dataset_path=dataset_path, model_dir=model_dir, n_jobs=n_jobs)
+    return time.perf_counter() - start
+
+
+def train_models(dataset_path='data/dataset.csv', model_dir='models', total_cores=None):
+    """
+    Fit every model whose stored artifact is out of date, each in its own process.
+
+    Returns {model name: wall seconds}. Models already in the model store are
+    skipped, so callers can construct them afterwards and get a fast load.
+    Called with other threads running (the background warm-up), the models
+    are fitted one after another in this process instead.
+    """
+    if not os.path.exists(dataset_path):
+        return {}
+
+    df = get_dataset(dataset_path)
+    store = ModelStore(model_dir)
+    stale = [name for name, model_class in MODEL_CLASSES.items()
+             if not store.has(name, model_class.model_fingerprint(df))]
+
+    if not stale:
+        print("✅ All models up to date in model store")
+        return {}
+
+    context = _pool_context()
+    if context is None:
+        budgets = {name: total_cores or os.cpu_count() or 1 for name in stale}
+    else:
+        budgets = core_budgets(stale, total_cores)
+
+    timings = {}
+    start = time.perf_counter()
+    if context is None:
+        for name in stale:
+            try:
+                timings[name] = _fit_model(name, dataset_path, model_dir, budgets[name])
+            except Exception as e:
+                print(f"❌ Training {name} failed: {e}")
+    else:
+        with ProcessPoolExecutor(max_workers=len(stale), mp_context=context) as pool:
+            futures = {name: pool.submit(_fit_model, name, dataset_path, model_dir, budgets[name])
+                       for name in stale}
+            for name, future in futures.items():
+                try:
+                    timings[name] = future.result()
+                except Exception as e:
+                    print(f"❌ Training {name} failed: {e}")
+
+    for name, seconds in timings.items():
+        print(f"⏱️ {name}: {seconds:.1f}s on {budgets[name]} core(s)")
+    print(f"✅ Trained {len(timings)} model(s) in {time.perf_counter() - start:.1f}s")
+
+    return timings
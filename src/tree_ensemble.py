@@ -0,0 +1,116 @@
+"""
+Compiled Tree Ensemble - Array-backed random forest evaluation for low-latency scoring
+"""
+import numpy as np
+
+
+class CompiledForest:
+    """
+    Flattened copy of a fitted RandomForestClassifier.
+
+    All trees are stored back to back in contiguous node arrays
+    (feature, threshold, left, right, value, missing_left) and walked with
+    plain NumPy indexing, skipping sklearn's per-call input validation. Leaf
+    nodes point to themselves, so every row can take exactly max_depth steps.
+    NaN inputs follow missing_left, as sklearn's missing_go_to_left does.
+    Output matches RandomForestClassifier.predict_proba for the same input.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, classes, missing_left=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.classes_ = classes
+        self.missing_left = np.zeros(len(feature), dtype=bool) if missing_left is None else missing_left
+
+        # Walk state uses doubled node ids so a child lookup is children[2 * node + went_left]
+        # without a multiply per level; _feature/_threshold are indexed the same way.
+        self._children = np.ascontiguousarray(np.column_stack([2 * right, 2 * left]).ravel())
+        self._feature = np.repeat(feature, 2)
+        self._threshold = np.repeat(threshold, 2)
+        self._missing_left = np.repeat(self.missing_left, 2)
+        self._roots = 2 * roots
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        """Export a fitted sklearn forest into contiguous NumPy arrays"""
+        features, thresholds, lefts, rights, values, missing_lefts, roots = [], [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+            # Trees fitted before sklearn 1.3 have no missing-value routing: NaN goes right
+            missing_lefts.append(np.asarray(getattr(tree, 'missing_go_to_left', np.zeros(tree.node_count)),
+                                            dtype=bool))
+
+            # Normalise leaf counts to class probabilities, as DecisionTreeClassifier does
+            value = tree.value[:, 0, :]
+            totals = value.sum(axis=1, keepdims=True)
+            totals[totals == 0] = 1
+            values.append(value / totals)
+
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features), dtype=np.intp),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+            left=np.ascontiguousarray(np.concatenate(lefts), dtype=np.intp),
+            right=np.ascontiguousarray(np.concatenate(rights), dtype=np.intp),
+            value=np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth,
+            classes=np.asarray(forest.classes_),
+            missing_left=np.ascontiguousarray(np.concatenate(missing_lefts), dtype=bool)
+        )
+
+    def predict_proba(self, X):
+        """Class probabilities for one row or a small batch, matching sklearn's predict_proba"""
+        # sklearn compares float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+
+        if X.shape[0] == 1:
+            # Single-lead fast path: one node per tree, no row bookkeeping
+            x = X[0]
+            nodes = self._roots
+            if not np.isnan(x).any():
+                for _ in range(self.max_depth):
+                    nodes = self._children[nodes + (x[self._feature[nodes]] <= self._threshold[nodes])]
+                return self.value[nodes >> 1].mean(axis=0, keepdims=True)
+
+            for _ in range(self.max_depth):
+                values = x[self._feature[nodes]]
+                go_left = (values <= self._threshold[nodes]) | (np.isnan(values) & self._missing_left[nodes])
+                nodes = self._children[nodes + go_left]
+            return self.value[nodes >> 1].mean(axis=0, keepdims=True)
+
+        # One node per (row, tree); row offsets let us index the flattened input
+        flat_X = X.ravel()
+        row_offsets = (np.arange(X.shape[0]) * X.shape[1])[:, np.newaxis]
+        nodes = np.broadcast_to(self._roots, (X.shape[0], len(self._roots)))
+
+        has_missing = np.isnan(flat_X).any()
+
+        for _ in range(self.max_depth):
+            values = flat_X[row_offsets + self._feature[nodes]]
+            go_left = values <= self._threshold[nodes]
+            if has_missing:
+                go_left |= np.isnan(values) & self._missing_left[nodes]
+            nodes = self._children[nodes + go_left]
+
+        return self.value[nodes >> 1].mean(axis=1)
@@ -3,8 +3,13 @@ from flask_login import LoginManager, login_user, login_required, logout_user, c
 from flask_mail import Mail, Message
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
-from sqlalchemy import func
+from sqlalchemy import func, or_, update, inspect, text, event
+from sqlalchemy.engine import Engine
 from datetime import datetime
+from functools import wraps
+import click
+import threading
+import gc
 import os
 import pandas as pd
 
@@ -16,6 +21,15 @@ from customer_segmentation import CustomerSegmenter
 from sales_tracking import SalesTracker
 from team_tracking import TeamTracker
 from email_automation import EmailAutomation
+from dataset_registry import get_dataset
+from lead_aggregates import SharedAggregates, team_totals, lead_summary_query, rep_summary_query
+from lead_aggregates import query_plan, full_table_scans
+from lead_importer import import_leads, sync_leads
+from inference_service import BatchInferenceService
+from response_cache import ResponseCache
+from payload_versions import SectionVersions
+from live_updates import SocketIO, LiveUpdatePublisher, register_handlers
+from training_orchestrator import train_models
 
 # ============================================================================
 # FLASK APP INITIALIZATION
@@ -71,12 +85,15 @@ class Lead(db.Model):
     company = db.Column(db.String(120))
     industry = db.Column(db.String(100))
     status = db.Column(db.String(50), default='New')
+    stage = db.Column(db.String(50))  # Pipeline stage from the dataset; a LeadScorer feature
     created_date = db.Column(db.String(50))
     last_login = db.Column(db.String(50))
     last_contact = db.Column(db.String(50))
     notes = db.Column(db.Text)
     score = db.Column(db.Float, default=0)
+    score_version = db.Column(db.String(32))  # LeadScorer.model_version that produced `score`; NULL = needs rescoring
     revenue_potential = db.Column(db.Float, default=0)
+    days_to_convert = db.Column(db.Float)  # LeadScorer feature; NULL scores with the model's default
     converted = db.Column(db.Integer, default=0)
     churned = db.Column(db.Integer, default=0)
     deal_amount = db.Column(db.Float, default=0)
@@ -85,8 +102,128 @@ class Lead(db.Model):
     performance_score = db.Column(db.Float, default=75)
     avg_monthly_spend = db.Column(db.Float, default=0)
     region = db.Column(db.String(100))
+    source = db.Column(db.String(100))
     company_size = db.Column(db.String(50))
     product_category = db.Column(db.String(100))
+    row_hash = db.Column(db.BigInteger)  # lead_importer.row_hashes() of the CSV row last written; NULL = never synced
+    import_source = db.Column(db.String(500))  # Path of the CSV (lead_sources) that last wrote the lead; NULL = created in the app
+
+    # Composite indexes are ordered for the GROUP BY of the query they serve and
+    # carry the aggregated columns, so those queries never touch the table itself.
+    __table_args__ = (
+        db.Index('ix_leads_converted_score', 'converted', 'score'),
+        db.Index('ix_leads_status_industry', 'status', 'industry', 'converted', 'churned', 'deal_amount'),
+        db.Index('ix_leads_rep_converted_amount', 'sales_rep', 'converted', 'deal_amount', 'performance_score'),
+    )
+
+
+class DataVersion(db.Model):
+    """Single-row counter of committed lead writes; versions the ?since= delta responses"""
+    __tablename__ = 'data_versions'
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+class LeadSource(db.Model):
+    """CSV files loaded into leads, with the file's stamp as of the last completed import or sync"""
+    __tablename__ = 'lead_sources'
+    path = db.Column(db.String(500), primary_key=True)
+    mtime_ns = db.Column(db.BigInteger)
+    size = db.Column(db.BigInteger)
+
+
+# Columns LeadScorer reads; changing any of them invalidates the stored score
+LEAD_SCORE_INPUTS = ('revenue_potential', 'days_to_convert', 'stage', 'source', 'industry', 'region')
+
+
+@event.listens_for(Lead, 'before_update')
+def _invalidate_lead_score(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[col].history.has_changes() for col in LEAD_SCORE_INPUTS):
+        if not state.attrs.score_version.history.has_changes():
+            target.score_version = None
+
+
+# Rendered dashboard API responses, shared by every client polling them
+response_cache = ResponseCache(ttl=int(os.environ.get('CRM_RESPONSE_CACHE_TTL', 30)))
+
+# Section versions of the dashboard payloads, for ?since=<version> deltas
+section_versions = SectionVersions()
+
+# Socket.IO server and room publisher, set up after the routes (None without flask_socketio)
+socketio = None
+live_updates = None
+
+
+@event.listens_for(Engine, 'after_execute')
+def _track_lead_writes(conn, clauseelement, multiparams, params, execution_options, result):
+    # Covers ORM flushes, bulk_save_objects, bulk update() and Core statements alike
+    table = getattr(clauseelement, 'table', None)
+    if getattr(clauseelement, 'is_dml', False) and getattr(table, 'name', None) == Lead.__tablename__:
+        if result.rowcount != 0:  # -1 (unknown) counts as a write; statements matching no row do not
+            conn.info['leads_written'] = True
+
+
+@event.listens_for(Engine, 'commit')
+def _invalidate_on_lead_commit(conn):
+    if conn.info.pop('leads_written', False):
+        # Runs before the DBAPI commit, so the counter moves in the same transaction as the data
+        bump_data_version(conn)
+        response_cache.invalidate()
+        if live_updates is not None:
+            live_updates.mark_dirty()
+
+
+@event.listens_for(Engine, 'rollback')
+def _discard_lead_writes(conn):
+    conn.info.pop('leads_written', None)
+
+
+def bump_data_version(conn):
+    table = DataVersion.__table__
+    result = conn.execute(table.update().where(table.c.id == 1).values(version=table.c.version + 1))
+    if result.rowcount == 0:
+        conn.execute(table.insert().values(id=1, version=1))
+
+
+def current_data_version():
+    """Version of the lead data visible to this request (0 before the first write)"""
+    return db.session.query(DataVersion.version).filter_by(id=1).scalar() or 0
+
+
+def upgrade_lead_schema():
+    """Add columns and indexes introduced after a database was first created (create_all never alters tables)"""
+    inspector = inspect(db.engine)
+    existing = {col['name'] for col in inspector.get_columns(Lead.__tablename__)}
+    existing_indexes = {index['name'] for index in inspector.get_indexes(Lead.__tablename__)}
+    with db.engine.begin() as conn:
+        added = [column for column in Lead.__table__.columns if column.name not in existing]
+        for column in added:
+            col_type = column.type.compile(dialect=db.engine.dialect)
+            conn.execute(text(f'ALTER TABLE {Lead.__tablename__} ADD COLUMN {column.name} {col_type}'))
+            print(f"✅ Added column leads.{column.name}")
+
+        # New columns are filled from the CSVs: forget their stamps so the next load re-syncs them
+        if added:
+            conn.execute(LeadSource.__table__.delete())
+
+        created = [index for index in Lead.__table__.indexes if index.name not in existing_indexes]
+        for index in created:
+            index.create(conn, checkfirst=True)
+            print(f"✅ Created index {index.name}")
+
+        # Refresh planner statistics so the new indexes are costed on real data
+        if created and db.engine.dialect.name == 'sqlite':
+            conn.execute(text(f'ANALYZE {Lead.__tablename__}'))
+
+
+def dashboard_queries():
+    """The queries behind the dashboard APIs, by name (for query-plan checks)"""
+    return {
+        'lead_summary': lead_summary_query(db.session, Lead),
+        'rep_summary': rep_summary_query(db.session, Lead),
+        'hot_leads': Lead.query.filter(Lead.converted == 0, Lead.score >= 70).order_by(Lead.score.desc()).limit(50)
+    }
 
 
 @login_manager.user_loader
@@ -98,108 +235,354 @@ def load_user(user_id):
 # INITIALIZE ML MODELS
 # ============================================================================
 
-print("🔄 Initializing ML Models...")
-lead_manager = LeadManager()
-lead_scorer = LeadScorer()
-churn_predictor = ChurnPredictor()
-segmentation = CustomerSegmenter()
-sales_tracker = SalesTracker()
-team_tracker = TeamTracker()
-print("✅ ML models loaded")
+# Models are built by warm_up() on a background thread so the app can serve
+# non-ML routes (and health checks) immediately after import.
+lead_manager = None
+lead_scorer = None
+churn_predictor = None
+segmentation = None
+sales_tracker = None
+team_tracker = None
+lead_scoring_service = None
+churn_service = None
+
+models_ready = threading.Event()
+warmup_error = None
+
+
+def load_models():
+    """Train or load every ML model and publish them as module globals"""
+    global lead_manager, lead_scorer, churn_predictor, segmentation, sales_tracker, team_tracker
+    global lead_scoring_service, churn_service
+
+    print("🔄 Initializing ML Models...")
+    train_models()  # Fits stale models in parallel; the constructors below then load them from the model store
+    lead_manager = LeadManager()
+    lead_scorer = LeadScorer()
+    churn_predictor = ChurnPredictor()
+    segmentation = CustomerSegmenter()
+    sales_tracker = SalesTracker()
+    team_tracker = TeamTracker()
+
+    # Concurrent single-row requests are coalesced into one model call per few milliseconds
+    lead_scoring_service = BatchInferenceService(lead_scorer.score_lead_batch,
+                                                 max_batch_size=256, max_wait_ms=5, name='lead-scoring')
+    churn_service = BatchInferenceService(churn_predictor.predict_churn_risks,
+                                          max_batch_size=256, max_wait_ms=5, name='churn')
+    print("✅ ML models loaded")
+
+
+def requires_models(view):
+    """Answer 503 instead of blocking while the models are still warming up"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not models_ready.is_set():
+            return jsonify({"error": "Models are warming up", "ready": False}), 503
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def cached_response(view):
+    """
+    Serve a GET API from response_cache, keyed by endpoint, user scope (role) and query string.
+
+    Responses carry an ETag, and Cache-Control: no-cache makes browsers revalidate
+    every poll with If-None-Match, which is answered 304 when nothing changed.
+    Responses marked with uncacheable() are passed through and never stored.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = (request.endpoint, getattr(current_user, 'role', None), request.query_string)
+
+        def render():
+            rendered = app.make_response(view(*args, **kwargs))
+            return rendered.get_data(), rendered.status_code, rendered.mimetype, not rendered.cache_control.no_store
+
+        entry = response_cache.get_or_render(key, render)
+        response = app.response_class(entry['body'], status=entry['status'], mimetype=entry['mimetype'])
+        if not entry['cacheable']:
+            return uncacheable(response)
+        response.set_etag(entry['etag'])
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response.make_conditional(request)
+    return wrapper
+
+
+def uncacheable(response):
+    """Mark a response (e.g. an error fallback) as not to be cached by us or the browser"""
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+def versioned_payload(name, payload_fn):
+    """
+    payload_fn() plus the data version it was computed at.
+
+    With ?since=<version> only the sections that changed after that version
+    are returned, as {"version": ..., "changes": {...}}. When nothing was
+    written since, no aggregate is computed at all.
+    """
+    # Read the version before the aggregates: a write landing in between is then resent, not lost
+    version = current_data_version()
+    since = request.args.get('since', type=int)
+    if since == version:
+        return {"version": version, "changes": {}}
+
+    state = section_versions.current(name, version) or section_versions.observe(name, version, payload_fn())
+    if since is None:
+        return {**state['payload'], "version": version}
+    return {"version": version, "changes": section_versions.delta(state, since)}
 
 
 # ============================================================================
 # DATASET LOADING FUNCTION
 # ============================================================================
 
+def record_lead_source(path, stat):
+    db.session.merge(LeadSource(path=path, mtime_ns=stat.st_mtime_ns, size=stat.st_size))
+    db.session.commit()
+
+
 def seed_leads_from_csv(csv_path):
-    """Seed database with CSV data - prevents duplicates"""
+    """Load the CSV into leads: a full import into an empty table, an incremental sync once the file changes"""
     try:
-        df = pd.read_csv(csv_path)
-        print(f"📊 Found dataset with {len(df)} records")
-        df = df.fillna('')
-
         with app.app_context():
-            # Check if database already has data
+            path = os.path.abspath(csv_path)
+            stat = os.stat(path)  # Taken before reading: a file replaced mid-sync is synced again next time
             existing_count = db.session.query(func.count(Lead.id)).scalar() or 0
-            if existing_count > 0:
-                print(f"ℹ️ Database already has {existing_count} records. Skipping seeding.")
-                return
+            source = db.session.get(LeadSource, path)
 
-            # Get existing emails
-            existing = {email for (email,) in db.session.query(Lead.email).all() if email}
-            new_objs = []
-
-            for idx, row in df.iterrows():
-                email = str(row.get('email', '')).strip()
-                if not email or email == 'nan' or email in existing:
-                    continue
-
-                try:
-                    lead = Lead(
-                        name=str(row.get('name', 'Unknown')).strip() or 'Unknown',
-                        email=email,
-                        phone=str(row.get('phone', '')).strip() or '',
-                        company=str(row.get('company', '')).strip() or '',
-                        industry=str(row.get('industry', '')).strip() or '',
-                        status=str(row.get('status', 'New')).strip() or 'New',
-                        created_date=str(row.get('created_date', '')).strip() or '',
-                        last_login=str(row.get('last_login', '')).strip() or '',
-                        last_contact=str(row.get('last_contact', '')).strip() or '',
-                        notes=str(row.get('notes', '')).strip() or '',
-                        score=float(row.get('score', 0) or 0),
-                        revenue_potential=float(row.get('revenue_potential', 0) or 0),
-                        converted=int(row.get('converted', 0) or 0),
-                        churned=int(row.get('churned', 0) or 0),
-                        deal_amount=float(row.get('deal_amount', 0) or 0),
-                        close_date=str(row.get('close_date', '')).strip() or '',
-                        sales_rep=str(row.get('sales_rep', 'Unassigned')).strip() or 'Unassigned',
-                        performance_score=float(row.get('performance_score', 75) or 75),
-                        avg_monthly_spend=float(row.get('avg_monthly_spend', 0) or 0),
-                        region=str(row.get('region', 'India')).strip() or 'India',
-                        company_size=str(row.get('company_size', 'Medium')).strip() or 'Medium',
-                        product_category=str(row.get('product_category', '')).strip() or ''
-                    )
-                    new_objs.append(lead)
-                    existing.add(email)
-                except Exception as e:
-                    print(f"⚠️ Error processing row {idx}: {e}")
-                    continue
-
-            if new_objs:
-                try:
-                    db.session.bulk_save_objects(new_objs)
-                    db.session.commit()
-                    print(f"✅ Seeded database with {len(new_objs)} new leads")
-                except Exception as db_error:
-                    db.session.rollback()
-                    print(f"⚠️ Bulk insert failed: {db_error}. Trying one-by-one...")
-                    for lead in new_objs:
-                        try:
-                            db.session.add(lead)
-                            db.session.commit()
-                        except Exception as e:
-                            db.session.rollback()
-                            continue
+            if existing_count == 0:
+                import_leads(db.engine, Lead.__table__, path, score_inputs=LEAD_SCORE_INPUTS)
+            elif source is not None and (source.mtime_ns, source.size) == (stat.st_mtime_ns, stat.st_size):
+                print(f"ℹ️ Database already has {existing_count} records and the CSV is unchanged. Skipping sync.")
+                return
             else:
-                print(f"ℹ️ All records already exist in database")
+                sync_leads(db.engine, Lead.__table__, path, score_inputs=LEAD_SCORE_INPUTS)
+            record_lead_source(path, stat)
     except Exception as e:
         print(f"❌ Error loading dataset: {e}")
 
 
+@app.cli.command('import-leads')
+@click.argument('csv_path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--chunk-size', default=50000, show_default=True, help='Rows validated and committed at a time')
+@click.option('--rejects', 'rejects_path', type=click.Path(dir_okay=False),
+              help='Write rejected rows (data row number, email and reason) to this CSV')
+def import_leads_command(csv_path, chunk_size, rejects_path):
+    """Upsert leads from a CSV file, matching existing leads on email"""
+    path = os.path.abspath(csv_path)
+    stat = os.stat(path)
+    import_leads(db.engine, Lead.__table__, path, score_inputs=LEAD_SCORE_INPUTS,
+                 chunk_size=chunk_size, rejects_path=rejects_path)
+    record_lead_source(path, stat)
+
+
+@app.cli.command('sync-leads')
+@click.argument('csv_path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--chunk-size', default=50000, show_default=True, help='Rows hashed and compared at a time')
+@click.option('--keep-missing', is_flag=True, help='Keep leads from this CSV whose email is no longer in it')
+@click.option('--rejects', 'rejects_path', type=click.Path(dir_okay=False),
+              help='Write rejected rows (data row number, email and reason) to this CSV')
+def sync_leads_command(csv_path, chunk_size, keep_missing, rejects_path):
+    """Write only the leads added, changed or removed since the last load of a CSV export (other sources are kept)"""
+    path = os.path.abspath(csv_path)
+    stat = os.stat(path)
+    sync_leads(db.engine, Lead.__table__, path, score_inputs=LEAD_SCORE_INPUTS, chunk_size=chunk_size,
+               delete_missing=not keep_missing, rejects_path=rejects_path)
+    record_lead_source(path, stat)
+
+
+# ============================================================================
+# LEAD SCORE MATERIALIZATION
+# ============================================================================
+
+def rescore_leads(batch_size=5000):
+    """Rescore only leads whose inputs changed or whose score came from another model version"""
+    version = lead_scorer.model_version
+    rescored = 0
+    last_id = 0
+
+    with app.app_context():
+        stale = or_(Lead.score_version.is_(None), Lead.score_version != version)
+        while True:
+            rows = db.session.query(Lead.id, *(getattr(Lead, col) for col in LEAD_SCORE_INPUTS)).filter(
+                stale, Lead.id > last_id
+            ).order_by(Lead.id).limit(batch_size).all()
+            if not rows:
+                break
+
+            batch = pd.DataFrame(rows, columns=['id', *LEAD_SCORE_INPUTS])
+            batch['score'] = lead_scorer.score_leads(batch)
+
+            db.session.execute(update(Lead), [
+                {'id': int(lead_id), 'score': float(score), 'score_version': version}
+                for lead_id, score in zip(batch['id'], batch['score'])
+            ])
+            db.session.commit()
+
+            rescored += len(rows)
+            last_id = rows[-1].id
+
+    if rescored:
+        print(f"✅ Rescored {rescored} leads with model {version}")
+    return rescored
+
+
+@app.cli.command('rescore-leads')
+def rescore_leads_command():
+    """Incrementally refresh stored lead scores"""
+    rescore_leads()
+
+
+@app.cli.command('check-query-plans')
+def check_query_plans_command():
+    """Fail if a dashboard query would full-scan the leads table (SQLite EXPLAIN QUERY PLAN)"""
+    if db.engine.dialect.name != 'sqlite':
+        print(f"ℹ️ Query plan check only supports SQLite (database is {db.engine.dialect.name})")
+        return
+
+    queries = dashboard_queries()
+    failures = full_table_scans(db.session, queries)
+    for name, query in queries.items():
+        print(f"{'❌' if name in failures else '✅'} {name}: {' | '.join(query_plan(db.session, query))}")
+    if failures:
+        raise SystemExit(1)
+
+
 # ============================================================================
 # LOAD DATA ON STARTUP
 # ============================================================================
 
-print("📊 Loading dataset...")
 CUSTOM_DATASET_PATH = os.path.join(project_root, 'data', 'dataset.csv')
-if os.path.exists(CUSTOM_DATASET_PATH):
-    seed_leads_from_csv(CUSTOM_DATASET_PATH)
-    lead_manager.leads_df = pd.read_csv(CUSTOM_DATASET_PATH)
-else:
-    print(f"⚠️ Dataset not found at {CUSTOM_DATASET_PATH}")
+with app.app_context():
+    db.create_all()
+    upgrade_lead_schema()
+
+
+def load_lead_data():
+    """Seed the database from the CSV and materialize lead scores (needs the models)"""
+    print("📊 Loading dataset...")
+    if os.path.exists(CUSTOM_DATASET_PATH):
+        seed_leads_from_csv(CUSTOM_DATASET_PATH)
+        lead_manager.leads_df = get_dataset(CUSTOM_DATASET_PATH)
+        rescore_leads()
+    else:
+        print(f"⚠️ Dataset not found at {CUSTOM_DATASET_PATH}")
 
-print("✅ All ML models loaded successfully!")
+
+def warm_up():
+    """Background start-up: load models, seed the database and materialize scores"""
+    global warmup_error
+    try:
+        load_models()
+        load_lead_data()
+
+        models_ready.set()
+        print("✅ All ML models loaded successfully!")
+    except Exception as e:
+        warmup_error = str(e)
+        print(f"❌ Model warm-up failed: {e}")
+
+
+def warm_up_data():
+    """
+    Background start-up of a worker forked from a preloading master (models already loaded).
+
+    Workers take turns through an instance-folder file lock, so the first one
+    seeds and rescores while the others then find nothing left to do.
+    """
+    global warmup_error
+    import fcntl  # gunicorn (and so preload mode) only runs on POSIX
+
+    try:
+        os.makedirs(app.instance_path, exist_ok=True)
+        with open(os.path.join(app.instance_path, 'warm_up.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            load_lead_data()
+
+        models_ready.set()
+        print("✅ Lead data loaded, worker ready")
+    except Exception as e:
+        warmup_error = str(e)
+        print(f"❌ Lead data warm-up failed: {e}")
+
+
+def start_warm_up():
+    """Kick off warm_up() on a daemon thread (no-op if it already ran or is running)"""
+    global warmup_thread
+    if warmup_thread is None or (not warmup_thread.is_alive() and not models_ready.is_set()):
+        warmup_thread = threading.Thread(target=warm_up, name='model-warmup', daemon=True)
+        warmup_thread.start()
+
+
+def preload_models():
+    """
+    gunicorn --preload: load or fit the models in the master, before it binds.
+
+    Seeding and rescoring are left to the workers (warm_up_data), so the
+    listeners open, and /healthz answers, as soon as the models are in.
+    """
+    global warmup_error
+    try:
+        load_models()
+    except Exception as e:
+        warmup_error = str(e)
+        print(f"❌ Model warm-up failed: {e}")
+    prepare_for_fork()
+
+
+def prepare_for_fork():
+    """
+    Called in the gunicorn master after the models were loaded (preload mode).
+
+    Moves every object loaded so far into the permanent GC generation, so the
+    collector in each worker never writes to (and copies) the pages holding
+    the shared models and DataFrames.
+    """
+    gc.collect()
+    gc.freeze()
+    print(f"✅ Froze {gc.get_freeze_count()} objects for copy-on-write sharing with workers")
+
+
+def after_fork():
+    """Called in each worker right after fork: drop inherited DB connections, then load the lead data"""
+    global warmup_thread
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+    if lead_scorer is not None and not models_ready.is_set():
+        warmup_thread = threading.Thread(target=warm_up_data, name='data-warmup', daemon=True)
+        warmup_thread.start()
+
+
+warmup_thread = None
+if os.environ.get('CRM_PRELOAD_MODELS') == '1':
+    # gunicorn --preload: models are built once in the master; workers inherit them copy-on-write
+    preload_models()
+elif os.environ.get('CRM_WARM_UP', '1') == '1':
+    # CRM_WARM_UP=0 imports the app without loading anything (tooling, import-time checks)
+    start_warm_up()
+
+
+# ============================================================================
+# ROUTES - HEALTH
+# ============================================================================
+
+@app.route('/healthz')
+def healthz():
+    """Liveness: the process is up and serving requests"""
+    return jsonify({"status": "ok"})
+
+
+@app.route('/readyz')
+def readyz():
+    """Readiness: models are loaded and the database has been seeded"""
+    if models_ready.is_set():
+        return jsonify({"status": "ready"})
+    if warmup_error:
+        return jsonify({"status": "failed", "error": warmup_error}), 503
+    return jsonify({"status": "warming_up"}), 503
 
 
 # ============================================================================
@@ -259,73 +642,145 @@ def analytics_dashboard():
 
 @app.route('/api/dashboard-data')
 @login_required
+@cached_response
 def get_dashboard_data():
-    """Get dashboard KPIs and data"""
+    """Get dashboard KPIs and data (?since=<version>: only the sections changed since)"""
     try:
-        total_leads = db.session.query(func.count(Lead.id)).scalar() or 0
-        total_revenue = db.session.query(func.sum(Lead.deal_amount)).scalar() or 0
-        converted_leads = db.session.query(func.count(Lead.id)).filter(Lead.converted == 1).scalar() or 0
-        churned_leads = db.session.query(func.count(Lead.id)).filter(Lead.churned == 1).scalar() or 0
-
-        conversion_rate = (converted_leads / total_leads * 100) if total_leads > 0 else 0
-        churn_rate = (churned_leads / total_leads * 100) if total_leads > 0 else 0
-
-        # Pipeline data
-        pipeline_data = []
-        statuses = db.session.query(Lead.status, func.count(Lead.id)).group_by(Lead.status).all()
-        for status, count in statuses:
-            if status:
-                pipeline_data.append({"stage": status, "count": count or 0})
-
-        if not pipeline_data:
-            pipeline_data = [{"stage": "New", "count": 0}]
-
-        # Revenue trend
-        revenue_trend = [
-            {"month": "Jan", "revenue": int(total_revenue * 0.08)},
-            {"month": "Feb", "revenue": int(total_revenue * 0.10)},
-            {"month": "Mar", "revenue": int(total_revenue * 0.12)},
-            {"month": "Apr", "revenue": int(total_revenue * 0.15)},
-            {"month": "May", "revenue": int(total_revenue * 0.28)},
-            {"month": "Jun", "revenue": int(total_revenue * 0.27)}
-        ]
-
-        # Team performance for dashboard
-        team_perf = []
-        reps = db.session.query(Lead.sales_rep, func.count(Lead.id), func.sum(Lead.deal_amount)).group_by(Lead.sales_rep).all()
-        for rep, count, revenue in reps:
-            if rep and rep != 'Unassigned':
-                team_perf.append({
-                    "name": rep,
-                    "leads_assigned": count or 0,
-                    "revenue": int(revenue or 0)
-                })
-
-        return jsonify({
-            "kpis": {
-                "total_revenue": int(total_revenue),
-                "conversion_rate": round(conversion_rate, 1),
-                "churn_rate": round(churn_rate, 1),
-                "total_leads": total_leads,
-                "active_deals": converted_leads
-            },
-            "revenue_trend": revenue_trend,
-            "pipeline_data": pipeline_data,
-            "recent_activities": [
-                {"type": "New Lead", "description": f"Total Leads: {total_leads}", "amount": "", "time": "Today"},
-                {"type": "Deal Won", "description": f"Converted: {converted_leads}", "amount": f"₹{int(total_revenue):,}", "time": "Recent"}
-            ],
-            "team_performance": team_perf
-        })
+        return jsonify(versioned_payload('dashboard', dashboard_payload))
     except Exception as e:
         print(f"❌ Dashboard error: {e}")
-        return jsonify({
+        return uncacheable(jsonify({
             "kpis": {"total_revenue": 0, "conversion_rate": 0, "churn_rate": 0, "total_leads": 0, "active_deals": 0},
             "revenue_trend": [],
             "pipeline_data": [],
             "recent_activities": [],
             "team_performance": []
+        }))
+
+
+def dashboard_payload(aggregates=None):
+    """Dashboard KPIs and charts (two scans: lead summary and per-rep summary)"""
+    aggregates = aggregates or SharedAggregates(db.session, Lead)
+    summary = aggregates.lead_summary()
+    total_leads = summary['total_leads']
+    total_revenue = summary['total_revenue']
+    converted_leads = summary['converted']
+    churned_leads = summary['churned']
+
+    conversion_rate = (converted_leads / total_leads * 100) if total_leads > 0 else 0
+    churn_rate = (churned_leads / total_leads * 100) if total_leads > 0 else 0
+
+    # Pipeline data
+    pipeline_data = []
+    for status, count in summary['by_status'].items():
+        if status:
+            pipeline_data.append({"stage": status, "count": count or 0})
+
+    if not pipeline_data:
+        pipeline_data = [{"stage": "New", "count": 0}]
+
+    # Revenue trend
+    revenue_trend = [
+        {"month": "Jan", "revenue": int(total_revenue * 0.08)},
+        {"month": "Feb", "revenue": int(total_revenue * 0.10)},
+        {"month": "Mar", "revenue": int(total_revenue * 0.12)},
+        {"month": "Apr", "revenue": int(total_revenue * 0.15)},
+        {"month": "May", "revenue": int(total_revenue * 0.28)},
+        {"month": "Jun", "revenue": int(total_revenue * 0.27)}
+    ]
+
+    # Team performance for dashboard
+    team_perf = []
+    for rep in aggregates.rep_summary():
+        if rep['name'] and rep['name'] != 'Unassigned':
+            team_perf.append({
+                "name": rep['name'],
+                "leads_assigned": rep['leads'],
+                "revenue": int(rep['revenue'])
+            })
+
+    return {
+        "kpis": {
+            "total_revenue": int(total_revenue),
+            "conversion_rate": round(conversion_rate, 1),
+            "churn_rate": round(churn_rate, 1),
+            "total_leads": total_leads,
+            "active_deals": converted_leads
+        },
+        "revenue_trend": revenue_trend,
+        "pipeline_data": pipeline_data,
+        "recent_activities": [
+            {"type": "New Lead", "description": f"Total Leads: {total_leads}", "amount": "", "time": "Today"},
+            {"type": "Deal Won", "description": f"Converted: {converted_leads}", "amount": f"₹{int(total_revenue):,}", "time": "Recent"}
+        ],
+        "team_performance": team_perf
+    }
+
+
+# ============================================================================
+# API ENDPOINTS - HOT LEADS
+# ============================================================================
+
+@app.route('/api/hot-leads')
+@login_required
+@requires_models
+def get_hot_leads():
+    """Get unconverted leads by stored score (range scan on ix_leads_converted_score)"""
+    try:
+        threshold = request.args.get('threshold', 70, type=float)
+        limit = request.args.get('limit', 50, type=int)
+
+        leads = Lead.query.filter(
+            Lead.converted == 0, Lead.score >= threshold
+        ).order_by(Lead.score.desc()).limit(limit).all()
+
+        return jsonify({
+            "hot_leads": [{
+                "id": lead.id,
+                "name": lead.name,
+                "company": lead.company or lead.industry,
+                "score": int(lead.score or 0),
+                "revenue_potential": lead.revenue_potential or 0
+            } for lead in leads],
+            "model_version": lead_scorer.model_version
         })
+    except Exception as e:
+        print(f"❌ Hot leads error: {e}")
+        return jsonify({"hot_leads": [], "model_version": None})
+
+
+# ============================================================================
+# API ENDPOINTS - MODEL SCORING
+# ============================================================================
+
+@app.route('/api/score-lead', methods=['POST'])
+@login_required
+@requires_models
+def score_lead():
+    """Score a single lead (batched with concurrent requests)"""
+    lead_data = request.get_json(silent=True) or {}
+    if not isinstance(lead_data, dict):
+        return jsonify({"error": "Expected a JSON object"}), 400
+    try:
+        return jsonify({"score": int(lead_scoring_service.predict(lead_data, timeout=5))})
+    except Exception as e:
+        print(f"❌ Lead scoring error: {e}")
+        return jsonify({"score": lead_scorer.calculate_score(lead_data)})
+
+
+@app.route('/api/churn-risk', methods=['POST'])
+@login_required
+@requires_models
+def churn_risk():
+    """Predict churn risk for a single customer (batched with concurrent requests)"""
+    customer_data = request.get_json(silent=True) or {}
+    if not isinstance(customer_data, dict):
+        return jsonify({"error": "Expected a JSON object"}), 400
+    try:
+        return jsonify({"churn_risk": int(churn_service.predict(customer_data, timeout=5))})
+    except Exception as e:
+        print(f"❌ Churn risk error: {e}")
+        return jsonify({"churn_risk": 0})
 
 
 # ============================================================================
@@ -334,55 +789,65 @@ def get_dashboard_data():
 
 @app.route('/api/team-data')
 @login_required
+@cached_response
 def get_team_data():
-    """Get team performance metrics"""
+    """Get team performance metrics (?since=<version>: only the sections changed since)"""
     try:
-        team_members = []
-        reps_data = db.session.query(
-            Lead.sales_rep,
-            func.count(Lead.id),
-            func.sum(Lead.deal_amount),
-            func.avg(Lead.performance_score)
-        ).group_by(Lead.sales_rep).all()
-
-        for rep, count, revenue, performance in reps_data:
-            if rep and rep != 'Unassigned':
-                converted = db.session.query(func.count(Lead.id)).filter(
-                    Lead.sales_rep == rep, Lead.converted == 1).scalar() or 0
-                team_members.append({
-                    "name": rep,
-                    "role": "Sales Rep",
-                    "leads_assigned": count or 0,
-                    "converted": converted,
-                    "performance": round(performance or 75, 1),
-                    "revenue": int(revenue or 0),
-                    "target": int((revenue or 0) * 1.2)
-                })
-
-        total_members = len(team_members)
-        total_revenue = db.session.query(func.sum(Lead.deal_amount)).scalar() or 0
-        avg_performance = db.session.query(func.avg(Lead.performance_score)).scalar() or 75
-
-        return jsonify({
-            "team_performance": sorted(team_members, key=lambda x: x['revenue'], reverse=True),
-            "team_stats": {
-                "total_members": total_members,
-                "avg_performance": round(avg_performance, 1),
-                "total_revenue": int(total_revenue),
-                "target_achievement": round((avg_performance / 10 * 100), 1) if avg_performance else 0
-            },
-            "recent_tasks": [
-                {"assignee": "Team", "task": "Follow up on leads", "priority": "High", "due": "2025-11-15"},
-                {"assignee": "Team", "task": "Demo scheduling", "priority": "Medium", "due": "2025-11-16"}
-            ]
-        })
+        return jsonify(versioned_payload('team', team_payload))
     except Exception as e:
         print(f"❌ Team data error: {e}")
-        return jsonify({
+        return uncacheable(jsonify({
             "team_performance": [],
             "team_stats": {"total_members": 0, "avg_performance": 0, "total_revenue": 0, "target_achievement": 0},
             "recent_tasks": []
-        })
+        }))
+
+
+def team_member(rep):
+    """Team table row for one rep_summary() row"""
+    return {
+        "name": rep['name'],
+        "role": "Sales Rep",
+        "leads_assigned": rep['leads'],
+        "converted": rep['converted'],
+        "performance": round(rep['performance'] or 75, 1),
+        "revenue": int(rep['revenue']),
+        "target": int(rep['revenue'] * 1.2)
+    }
+
+
+def rep_payloads(aggregates=None):
+    """Per-rep rows keyed by rep name, for the per-rep live-update rooms"""
+    aggregates = aggregates or SharedAggregates(db.session, Lead)
+    return {rep['name']: team_member(rep) for rep in aggregates.rep_summary()
+            if rep['name'] and rep['name'] != 'Unassigned'}
+
+
+def team_payload(aggregates=None):
+    """Rep performance and team totals (one grouped query; totals are derived from it)"""
+    aggregates = aggregates or SharedAggregates(db.session, Lead)
+    reps = aggregates.rep_summary()
+    team_members = [team_member(rep) for rep in reps if rep['name'] and rep['name'] != 'Unassigned']
+
+    # Totals cover every lead, including unassigned ones, as the per-table aggregates did
+    totals = team_totals(reps)
+    total_members = len(team_members)
+    total_revenue = totals['total_revenue']
+    avg_performance = totals['avg_performance'] or 75
+
+    return {
+        "team_performance": sorted(team_members, key=lambda x: x['revenue'], reverse=True),
+        "team_stats": {
+            "total_members": total_members,
+            "avg_performance": round(avg_performance, 1),
+            "total_revenue": int(total_revenue),
+            "target_achievement": round((avg_performance / 10 * 100), 1) if avg_performance else 0
+        },
+        "recent_tasks": [
+            {"assignee": "Team", "task": "Follow up on leads", "priority": "High", "due": "2025-11-15"},
+            {"assignee": "Team", "task": "Demo scheduling", "priority": "Medium", "due": "2025-11-16"}
+        ]
+    }
 
 
 # ============================================================================
@@ -391,71 +856,162 @@ def get_team_data():
 
 @app.route('/api/analytics-data')
 @login_required
+@cached_response
 def get_analytics_data():
-    """Get analytics and insights"""
+    """Get analytics and insights (?since=<version>: only the sections changed since)"""
     try:
-        total_leads = db.session.query(func.count(Lead.id)).scalar() or 0
-        total_revenue = db.session.query(func.sum(Lead.deal_amount)).scalar() or 0
-        converted_leads = db.session.query(func.count(Lead.id)).filter(Lead.converted == 1).scalar() or 0
-        churned_leads = db.session.query(func.count(Lead.id)).filter(Lead.churned == 1).scalar() or 0
-
-        conversion_rate = (converted_leads / total_leads * 100) if total_leads > 0 else 0
-        churn_rate = (churned_leads / total_leads * 100) if total_leads > 0 else 0
-        growth_rate = 22.1
-
-        # Pipeline stages
-        pipeline = []
-        statuses = db.session.query(Lead.status, func.count(Lead.id)).group_by(Lead.status).all()
-        for status, count in statuses:
-            if status:
-                pipeline.append({"stage": status, "count": count or 0})
-
-        if not pipeline:
-            pipeline = [{"stage": "New", "count": 0}]
-
-        # Churn risk distribution
-        low_risk = total_leads - churned_leads
-        high_risk = churned_leads
-        medium_risk = max(0, int(total_leads * 0.3))
-
-        # Revenue trend
-        revenue_trend = [
-            {"month": "Jan", "revenue": int(total_revenue * 0.08)},
-            {"month": "Feb", "revenue": int(total_revenue * 0.10)},
-            {"month": "Mar", "revenue": int(total_revenue * 0.12)},
-            {"month": "Apr", "revenue": int(total_revenue * 0.15)},
-            {"month": "May", "revenue": int(total_revenue * 0.28)},
-            {"month": "Jun", "revenue": int(total_revenue * 0.27)}
-        ]
-
-        # Industry distribution
-        industries = db.session.query(Lead.industry, func.count(Lead.id)).group_by(Lead.industry).all()
-        industry_dist = {}
-        for industry, count in industries:
-            if industry and industry != '0' and industry.strip():
-                industry_dist[str(industry)] = count
-
-        return jsonify({
-            "kpis": {
-                "total_revenue": int(total_revenue),
-                "conversion_rate": round(conversion_rate, 1),
-                "churn_rate": round(churn_rate, 1),
-                "growth_rate": growth_rate
-            },
-            "revenue_trend": revenue_trend,
-            "pipeline": pipeline,
-            "industry_dist": industry_dist if industry_dist else {"Education": 12, "Finance": 10, "IT": 10},
-            "churn_risk": [low_risk, medium_risk, high_risk]
-        })
+        return jsonify(versioned_payload('analytics', analytics_payload))
     except Exception as e:
         print(f"❌ Analytics error: {e}")
-        return jsonify({
+        return uncacheable(jsonify({
             "kpis": {"total_revenue": 0, "conversion_rate": 0, "churn_rate": 0, "growth_rate": 0},
             "revenue_trend": [],
             "pipeline": [],
             "industry_dist": {},
             "churn_risk": []
-        })
+        }))
+
+
+def analytics_payload(aggregates=None):
+    """Analytics KPIs and distributions (one scan of the leads table)"""
+    aggregates = aggregates or SharedAggregates(db.session, Lead)
+    summary = aggregates.lead_summary()
+    total_leads = summary['total_leads']
+    total_revenue = summary['total_revenue']
+    converted_leads = summary['converted']
+    churned_leads = summary['churned']
+
+    conversion_rate = (converted_leads / total_leads * 100) if total_leads > 0 else 0
+    churn_rate = (churned_leads / total_leads * 100) if total_leads > 0 else 0
+    growth_rate = 22.1
+
+    # Pipeline stages
+    pipeline = []
+    for status, count in summary['by_status'].items():
+        if status:
+            pipeline.append({"stage": status, "count": count or 0})
+
+    if not pipeline:
+        pipeline = [{"stage": "New", "count": 0}]
+
+    # Churn risk distribution
+    low_risk = total_leads - churned_leads
+    high_risk = churned_leads
+    medium_risk = max(0, int(total_leads * 0.3))
+
+    # Revenue trend
+    revenue_trend = [
+        {"month": "Jan", "revenue": int(total_revenue * 0.08)},
+        {"month": "Feb", "revenue": int(total_revenue * 0.10)},
+        {"month": "Mar", "revenue": int(total_revenue * 0.12)},
+        {"month": "Apr", "revenue": int(total_revenue * 0.15)},
+        {"month": "May", "revenue": int(total_revenue * 0.28)},
+        {"month": "Jun", "revenue": int(total_revenue * 0.27)}
+    ]
+
+    # Industry distribution
+    industry_dist = {}
+    for industry, count in summary['by_industry'].items():
+        if industry and industry != '0' and industry.strip():
+            industry_dist[str(industry)] = count
+    industry_dist = dict(sorted(industry_dist.items()))
+
+    return {
+        "kpis": {
+            "total_revenue": int(total_revenue),
+            "conversion_rate": round(conversion_rate, 1),
+            "churn_rate": round(churn_rate, 1),
+            "growth_rate": growth_rate
+        },
+        "revenue_trend": revenue_trend,
+        "pipeline": pipeline,
+        "industry_dist": industry_dist if industry_dist else {"Education": 12, "Finance": 10, "IT": 10},
+        "churn_risk": [low_risk, medium_risk, high_risk]
+    }
+
+
+# ============================================================================
+# API ENDPOINTS - BOOTSTRAP (every page's data in one round trip)
+# ============================================================================
+
+BOOTSTRAP_PAYLOADS = {
+    'dashboard': dashboard_payload,
+    'team': team_payload,
+    'analytics': analytics_payload
+}
+
+
+def parse_bootstrap_fields(values):
+    """
+    fields=dashboard,team.team_stats -> {'dashboard': None, 'team': {'team_stats'}}
+
+    A payload name selects the whole payload, name.section one of its
+    top-level sections. No fields selects every payload.
+    """
+    selected = {}
+    for field in filter(None, (part.strip() for value in values for part in value.split(','))):
+        name, _, section = field.partition('.')
+        if name not in BOOTSTRAP_PAYLOADS:
+            raise ValueError(f"Unknown field '{field}' (expected one of: {', '.join(BOOTSTRAP_PAYLOADS)})")
+        if not section:
+            selected[name] = None
+        elif selected.get(name, set()) is not None:
+            selected.setdefault(name, set()).add(section)
+    return selected or dict.fromkeys(BOOTSTRAP_PAYLOADS)
+
+
+def bootstrap_payload(selected):
+    """The selected payload sections, computed from one shared lead summary and one rep summary"""
+    version = current_data_version()
+    aggregates = SharedAggregates(db.session, Lead)
+    result = {"version": version}
+    for name, sections in selected.items():
+        # Payloads already computed at this version (e.g. by ?since= polls) are reused as they are
+        state = (section_versions.current(name, version)
+                 or section_versions.observe(name, version, BOOTSTRAP_PAYLOADS[name](aggregates)))
+        payload = state['payload']
+        if sections is None:
+            result[name] = payload
+            continue
+        unknown = sections - payload.keys()
+        if unknown:
+            raise ValueError(f"Unknown {name} section(s): {', '.join(sorted(unknown))}")
+        result[name] = {section: payload[section] for section in sections}
+    return result
+
+
+@app.route('/api/bootstrap')
+@login_required
+@cached_response
+def get_bootstrap():
+    """Get several pages' data at once (?fields=dashboard,team,analytics.kpis; default: everything)"""
+    try:
+        return jsonify(bootstrap_payload(parse_bootstrap_fields(request.args.getlist('fields'))))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"❌ Bootstrap error: {e}")
+        return jsonify({"error": "Could not load dashboard data"}), 500
+
+
+# ============================================================================
+# LIVE UPDATES - SOCKET.IO PUSH (the JSON endpoints above remain the polling fallback)
+# ============================================================================
+
+if SocketIO is not None:
+    # Websocket-only clients need no sticky sessions; set a message queue (e.g. Redis)
+    # so broadcasts from one gunicorn worker reach clients connected to the others.
+    socketio = SocketIO(app, async_mode='threading',
+                        message_queue=os.environ.get('CRM_SOCKETIO_MESSAGE_QUEUE'))
+    live_updates = LiveUpdatePublisher(socketio, app, {
+        'dashboard': dashboard_payload,
+        'team': team_payload,
+        'analytics': analytics_payload
+    }, rep_payloads_fn=rep_payloads)
+    register_handlers(socketio, live_updates)
+    print("✅ Live updates enabled (Socket.IO)")
+else:
+    print("ℹ️ flask_socketio not installed: dashboards will poll for updates")
 
 
 # ============================================================================
@@ -482,7 +1038,10 @@ def demo_web_dashboard():
     print("📊 Dashboard: http://localhost:5000/")
     print("🔐 Default Login: username='admin', password='admin123'")
     print("💡 Press Ctrl+C to stop the server\n")
-    app.run(debug=True, port=5000, host='0.0.0.0')
+    if socketio is not None:
+        socketio.run(app, debug=True, port=5000, host='0.0.0.0', allow_unsafe_werkzeug=True)
+    else:
+        app.run(debug=True, port=5000, host='0.0.0.0')
 
 
 if __name__ == '__main__':
@@ -1,19 +1,21 @@
 // Analytics Dashboard JavaScript - InnoStart Style
 document.addEventListener('DOMContentLoaded', function() {
     loadAnalyticsData();
-    setInterval(loadAnalyticsData, 30000);
+    // Pushed over Socket.IO when available, polled every 30 seconds otherwise
+    LiveUpdates.subscribe('analytics', renderAnalyticsData, loadAnalyticsData, 30000);
 });
 
 function loadAnalyticsData() {
-    fetch('/api/analytics-data')
-        .then(response => response.json())
-        .then(data => {
-            updateAnalyticsKPIs(data.kpis);
-            updateAnalyticsCharts(data);
-        })
+    LiveUpdates.fetchData('/api/analytics-data')
+        .then(renderAnalyticsData)
         .catch(error => console.error('Error loading analytics data:', error));
 }
 
+function renderAnalyticsData(data) {
+    updateAnalyticsKPIs(data.kpis);
+    updateAnalyticsCharts(data);
+}
+
 function updateAnalyticsKPIs(kpis) {
     document.getElementById('analytics-revenue').textContent =
         new Intl.NumberFormat('en-US', {
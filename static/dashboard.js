@@ -1,21 +1,26 @@
 // Dashboard JavaScript - InnoStart Style
 document.addEventListener('DOMContentLoaded', function() {
-    loadDashboardData();
-    setInterval(loadDashboardData, 30000);
+    // One request loads this page and primes the team and analytics pages
+    LiveUpdates.bootstrap(['dashboard', 'team', 'analytics'])
+        .then(pages => renderDashboardData(pages.dashboard))
+        .catch(() => loadDashboardData());
+    // Pushed over Socket.IO when available, polled every 30 seconds otherwise
+    LiveUpdates.subscribe('dashboard', renderDashboardData, loadDashboardData, 30000);
 });
 
 function loadDashboardData() {
-    fetch('/api/dashboard-data')
-        .then(response => response.json())
-        .then(data => {
-            updateKPIs(data.kpis);
-            updateCharts(data);
-            updateActivities(data.recent_activities);
-            updateMLInsights(data);
-        })
+    LiveUpdates.fetchData('/api/dashboard-data')
+        .then(renderDashboardData)
         .catch(error => console.error('Error loading dashboard data:', error));
 }
 
+function renderDashboardData(data) {
+    updateKPIs(data.kpis);
+    updateCharts(data);
+    updateActivities(data.recent_activities);
+    updateMLInsights(data);
+}
+
 function updateKPIs(kpis) {
     document.getElementById('total-revenue').textContent =
         new Intl.NumberFormat('en-US', { style: 'currency', currency: 'USD', maximumFractionDigits: 0 }).format(kpis.total_revenue || 0);
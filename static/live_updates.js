@@ -0,0 +1,114 @@
+// Live Updates - Socket.IO push from the server, with polling as the fallback
+const LiveUpdates = (function() {
+    const subscriptions = {};  // room -> { data, onData, poll, pollInterval, timer }
+    const polled = {};  // url -> { version, data } of the last JSON API response
+    const API_URLS = { dashboard: '/api/dashboard-data', team: '/api/team-data', analytics: '/api/analytics-data' };
+    let socket = null;
+
+    // Kept in sessionStorage too, so the next page opened only asks for what changed since
+    function lastPolled(url) {
+        if (!polled[url]) {
+            try {
+                polled[url] = JSON.parse(sessionStorage.getItem('liveUpdates:' + url)) || undefined;
+            } catch (e) { /* storage unavailable: keep in memory only */ }
+        }
+        return polled[url];
+    }
+
+    function remember(url, version, data) {
+        polled[url] = { version: version, data: data };
+        try {
+            sessionStorage.setItem('liveUpdates:' + url, JSON.stringify(polled[url]));
+        } catch (e) { /* storage unavailable: keep in memory only */ }
+    }
+
+    // Fetch a dashboard API; once a version is known only the sections changed since are transferred
+    function fetchData(url) {
+        const last = lastPolled(url);
+        return fetch(last ? url + '?since=' + last.version : url)
+            .then(response => response.json())
+            .then(body => {
+                if (last && body.changes) {
+                    Object.assign(last.data, body.changes);
+                    remember(url, body.version, last.data);
+                    return last.data;
+                }
+                if (body.version !== undefined) {
+                    remember(url, body.version, body);
+                }
+                return body;
+            });
+    }
+
+    // Every named page's data in one round trip; later fetchData calls for them start from it
+    function bootstrap(names) {
+        return fetch('/api/bootstrap?fields=' + names.join(','))
+            .then(response => response.json())
+            .then(body => {
+                if (body.error) throw new Error(body.error);
+                names.forEach(name => remember(API_URLS[name], body.version, body[name]));
+                return body;
+            });
+    }
+
+    function startPolling(room) {
+        const sub = subscriptions[room];
+        if (sub && !sub.timer) {
+            sub.timer = setInterval(sub.poll, sub.pollInterval);
+        }
+    }
+
+    function stopPolling(room) {
+        const sub = subscriptions[room];
+        if (sub && sub.timer) {
+            clearInterval(sub.timer);
+            sub.timer = null;
+        }
+    }
+
+    function connect() {
+        if (socket || typeof io === 'undefined') return socket;
+
+        // Websocket only: no long-polling transport, so no sticky sessions needed
+        socket = io({ transports: ['websocket'] });
+
+        socket.on('connect', () => {
+            Object.keys(subscriptions).forEach(room => {
+                socket.emit('subscribe', { room: room });
+                stopPolling(room);
+            });
+        });
+        socket.on('disconnect', () => Object.keys(subscriptions).forEach(startPolling));
+        socket.on('connect_error', () => Object.keys(subscriptions).forEach(startPolling));
+
+        // Full payload when joining a room, then only the sections that changed
+        socket.on('snapshot', message => {
+            const sub = subscriptions[message.room];
+            if (!sub) return;
+            sub.data = message.data;
+            sub.onData(sub.data);
+        });
+        socket.on('update', message => {
+            const sub = subscriptions[message.room];
+            if (!sub || !sub.data) return;
+            Object.assign(sub.data, message.changes);
+            sub.onData(sub.data);
+        });
+
+        return socket;
+    }
+
+    function subscribe(room, onData, poll, pollInterval = 30000) {
+        subscriptions[room] = { data: null, onData: onData, poll: poll, pollInterval: pollInterval, timer: null };
+
+        // Poll until the socket is up (and for good if Socket.IO is unavailable)
+        startPolling(room);
+        const s = connect();
+        if (s && s.connected) {
+            s.emit('subscribe', { room: room });
+            stopPolling(room);
+        }
+    }
+
+    return { subscribe: subscribe, fetchData: fetchData, bootstrap: bootstrap };
+})();
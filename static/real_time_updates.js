@@ -8,7 +8,12 @@ class RealTimeDashboard {
     start() {
         this.isRunning = true;
         this.update();
-        this.intervalId = setInterval(() => this.update(), this.updateInterval);
+        if (typeof LiveUpdates !== 'undefined') {
+            // Server push; LiveUpdates polls via update() only while the socket is down
+            LiveUpdates.subscribe('dashboard', data => this.render(data), () => this.update(), this.updateInterval);
+        } else {
+            this.intervalId = setInterval(() => this.update(), this.updateInterval);
+        }
         console.log('🔄 Real-time updates started');
     }
 
@@ -26,14 +31,12 @@ class RealTimeDashboard {
             this.showUpdateIndicator();
 
             // Fetch fresh data
-            const response = await fetch('/api/dashboard-data');
-            const data = await response.json();
-
-            // Update KPIs
-            this.updateKPIs(data.kpis);
-
-            // Update charts
-            this.updateCharts(data);
+            if (typeof LiveUpdates !== 'undefined') {
+                this.render(await LiveUpdates.fetchData('/api/dashboard-data'));
+            } else {
+                const response = await fetch('/api/dashboard-data');
+                this.render(await response.json());
+            }
 
             // Hide loading indicator
             this.hideUpdateIndicator();
@@ -44,6 +47,16 @@ class RealTimeDashboard {
         }
     }
 
+    render(data) {
+        if (!this.isRunning) return;
+
+        // Update KPIs
+        this.updateKPIs(data.kpis);
+
+        // Update charts
+        this.updateCharts(data);
+    }
+
     showUpdateIndicator() {
         const indicator = document.querySelector('.live-indicator');
         if (indicator) {
@@ -1,21 +1,23 @@
 // Team Dashboard JavaScript - InnoStart Style
 document.addEventListener('DOMContentLoaded', function() {
     loadTeamData();
-    setInterval(loadTeamData, 30000);
+    // Pushed over Socket.IO when available, polled every 30 seconds otherwise
+    LiveUpdates.subscribe('team', renderTeamData, loadTeamData, 30000);
 });
 
 function loadTeamData() {
-    fetch('/api/team-data')
-        .then(response => response.json())
-        .then(data => {
-            updateTeamKPIs(data.team_stats);
-            updateTeamTable(data.team_performance);
-            updatePerformanceChart(data.team_performance);
-            updateTasksList(data.recent_tasks);
-        })
+    LiveUpdates.fetchData('/api/team-data')
+        .then(renderTeamData)
         .catch(error => console.error('Error loading team data:', error));
 }
 
+function renderTeamData(data) {
+    updateTeamKPIs(data.team_stats);
+    updateTeamTable(data.team_performance);
+    updatePerformanceChart(data.team_performance);
+    updateTasksList(data.recent_tasks);
+}
+
 function updateTeamKPIs(stats) {
     document.getElementById('team-members').textContent = stats.total_members || 0;
     document.getElementById('avg-performance').textContent = (stats.avg_performance || 0).toFixed(1) + '%';